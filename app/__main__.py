@@ -0,0 +1,50 @@
+import argparse
+import json
+import sys
+
+from app.engine import DEFAULT_PROFILE, analyze_batch, analyze_text, run_stage, set_result_cache
+
+# =========================
+# Command Line Interface
+# =========================
+# python -m app "some text"            analyze one text
+# echo "some text" | python -m app     analyze one text per stdin line (as a batch)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app", description="Score text for risk.")
+    parser.add_argument("text", nargs="*", help="Text to analyze (default: read lines from stdin)")
+    parser.add_argument("--scoring-profile", default=DEFAULT_PROFILE, help="Scoring profile name")
+    parser.add_argument("--scoring-mode", default=None, help="presence or density")
+    parser.add_argument(
+        "--profile", metavar="PREFIX", default=None,
+        help="Write cProfile stats to PREFIX.pstats and per-stage timings to PREFIX.json"
+    )
+    parser.add_argument("--cache", metavar="PATH", default=None, help="SQLite result cache file")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        from app.cache import ResultCache
+        set_result_cache(ResultCache(args.cache))
+
+    def run():
+        if args.text:
+            results = [analyze_text(" ".join(args.text), args.scoring_profile, args.scoring_mode)]
+        else:
+            texts = [line.rstrip("\n") for line in sys.stdin]
+            results = analyze_batch(texts, args.scoring_profile, args.scoring_mode)
+        for result in results:
+            print(run_stage("serialize", json.dumps, result))
+
+    if args.profile:
+        from app.profiling import print_breakdown, profiled
+        with profiled(args.profile) as timer:
+            run()
+        print_breakdown(timer, args.profile)
+    else:
+        run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# =========================
+# Persistent Result Cache
+# =========================
+# SQLite in WAL mode, so every uvicorn worker and offline re-scoring job on
+# the host can share one file: readers never block the single writer and
+# results survive restarts. Keys are (lexicon version, scoring config hash,
+# normalized-text hash); see engine.result_cache_key. Eviction is FIFO by
+# insertion order and amortized: each connection trims the table back to
+# max_entries once it has written EVICTION_SLACK * max_entries rows since
+# its last trim, so the table may briefly exceed max_entries by that slack
+# per writer.
+
+CacheKey = Tuple[str, str, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    lexicon_version TEXT NOT NULL,
+    config_hash     TEXT NOT NULL,
+    text_hash       TEXT NOT NULL,
+    result          TEXT NOT NULL,
+    PRIMARY KEY (lexicon_version, config_hash, text_hash)
+)
+"""
+SQLITE_MAX_VARIABLES = 900  # stay under SQLite's default bound-parameter limit
+EVICTION_SLACK = 0.1  # fraction of max_entries written between trims
+
+
+class ResultCache:
+    def __init__(self, path: str, max_entries: int = 100_000, timeout: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self._evict_every = max(1, int(max_entries * EVICTION_SLACK))
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Dict[str, Any]]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[CacheKey, Dict[str, Any]] = {}
+        chunk_size = SQLITE_MAX_VARIABLES // 3
+
+        with self._lock:
+            for i in range(0, len(keys), chunk_size):
+                chunk = keys[i:i + chunk_size]
+                clause = " OR ".join(
+                    ["(lexicon_version = ? AND config_hash = ? AND text_hash = ?)"] * len(chunk)
+                )
+                params = [part for key in chunk for part in key]
+                rows = self._conn.execute(
+                    "SELECT lexicon_version, config_hash, text_hash, result "
+                    f"FROM results WHERE {clause}",
+                    params
+                )
+                for lexicon_version, config_hash, text_hash, result in rows:
+                    found[(lexicon_version, config_hash, text_hash)] = json.loads(result)
+        return found
+
+    def put(self, key: CacheKey, result: Dict[str, Any]) -> None:
+        self.put_many([(key, result)])
+
+    def put_many(self, items: Iterable[Tuple[CacheKey, Dict[str, Any]]]) -> None:
+        rows = [(*key, json.dumps(result)) for key, result in items]
+        if not rows:
+            return
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO results "
+                    "(lexicon_version, config_hash, text_hash, result) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._writes_since_evict += len(rows)
+                if self._writes_since_evict >= self._evict_every:
+                    self._evict()
+                    self._writes_since_evict = 0
+
+    def _evict(self) -> None:
+        # REPLACE re-inserts with a new rowid, so rowid order is insertion
+        # order, but deletes leave gaps. Rank rows instead of doing rowid
+        # arithmetic: drop everything at or below the (max_entries + 1)-th
+        # newest rowid (a NULL bound, i.e. a small table, deletes nothing).
+        # This walks max_entries rows, hence only every _evict_every writes.
+        self._conn.execute(
+            "DELETE FROM results WHERE rowid <= "
+            "(SELECT rowid FROM results ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return count
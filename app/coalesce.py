@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.engine import logger, normalize_text
+
+# =========================
+# Single-Flight Request Coalescing
+# =========================
+# Identical requests that arrive while the first one is still being
+# analyzed wait for that computation and share its result instead of
+# running analyze_text again. Nothing is cached once the call finishes.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` once per ``key`` among concurrent callers.
+        Returns (result, shared) where ``shared`` is True for callers that
+        waited on another caller's computation.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"coalesced_requests": self.coalesced, "in_flight": len(self._calls)}
+
+
+def request_key(text: Any, *config: Any) -> str:
+    """Hash of the normalized text plus any scoring configuration."""
+    normalized = normalize_text(text) if isinstance(text, str) else repr(text)
+    digest = hashlib.sha256(normalized.encode("utf-8", "surrogatepass"))
+    for part in config:
+        digest.update(b"\0" + str(part).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def coalesced_call(flight: SingleFlight, key: str, fn: Callable[[], Any]) -> Any:
+    result, shared = flight.do(key, fn)
+    if shared:
+        logger.info("Request coalesced | key=%s", key[:12])
+    return result
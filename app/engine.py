@@ -1,6 +1,11 @@
-import re
+import hashlib
 import logging
-from typing import Dict, Any
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union
+
+from app.matcher import get_matcher, lexicon_version
 
 # =========================
 # Logging Setup (STEP 3.1)
@@ -18,6 +23,17 @@ logger = logging.getLogger(__name__)
 MAX_TEXT_LENGTH = 5000
 KEYWORD_WEIGHT = 0.2
 MAX_CATEGORY_SCORE = 0.6  # Prevents saturation from one category
+MEDIUM_THRESHOLD = 0.3
+HIGH_THRESHOLD = 0.7
+DEFAULT_PROFILE = "default"
+
+# Scoring modes: "presence" counts each keyword once (default), "density"
+# scales each keyword by its hit count and hits per 100 processed chars.
+SCORING_MODE_PRESENCE = "presence"
+SCORING_MODE_DENSITY = "density"
+SCORING_MODES = (SCORING_MODE_PRESENCE, SCORING_MODE_DENSITY)
+MAX_COUNT_FACTOR = 3.0  # 1 hit -> 1.0, 2 hits -> 2.0, 4+ hits -> 3.0
+DENSITY_SATURATION = 1.0  # hits per 100 chars at which density stops mattering
 
 
 # =========================
@@ -128,6 +144,123 @@ RISK_KEYWORDS = {
 }
 
 
+# =========================
+# Scoring Profiles
+# =========================
+@dataclass(frozen=True)
+class ScoringProfile:
+    """
+    Named scoring configuration. Profiles that reference the same lexicon
+    share one compiled matcher; only the scoring stage differs.
+    """
+    name: str
+    lexicon: Dict[str, List[str]]
+    keyword_weight: float = KEYWORD_WEIGHT
+    max_category_score: float = MAX_CATEGORY_SCORE
+    medium_threshold: float = MEDIUM_THRESHOLD
+    high_threshold: float = HIGH_THRESHOLD
+    categories: Optional[Tuple[str, ...]] = None  # None = every lexicon category
+    scoring_mode: str = SCORING_MODE_PRESENCE
+
+    def scored_categories(self):
+        if self.categories is None:
+            return self.lexicon.items()
+        return [
+            (category, self.lexicon[category])
+            for category in self.categories
+            if category in self.lexicon
+        ]
+
+
+SCORING_PROFILES: Dict[str, ScoringProfile] = {
+    DEFAULT_PROFILE: ScoringProfile(name=DEFAULT_PROFILE, lexicon=RISK_KEYWORDS),
+}
+
+
+def register_profile(profile: ScoringProfile) -> None:
+    SCORING_PROFILES[profile.name] = profile
+
+
+def get_profile(profile: Union[str, ScoringProfile, None]) -> Optional[ScoringProfile]:
+    if profile is None:
+        return SCORING_PROFILES[DEFAULT_PROFILE]
+    if isinstance(profile, ScoringProfile):
+        return profile
+    return SCORING_PROFILES.get(profile)
+
+
+def keyword_contribution(
+    weight: float,
+    count: int,
+    processed_length: int,
+    scoring_mode: str
+) -> float:
+    """
+    Score contributed by one matched keyword. In density mode, repeated
+    hits raise the score logarithmically while sparse hits in long text
+    count for down to half a presence hit.
+    """
+    if scoring_mode == SCORING_MODE_PRESENCE:
+        return weight
+
+    count_factor = min(1.0 + math.log2(count), MAX_COUNT_FACTOR)
+    density = count * 100.0 / processed_length
+    density_factor = 0.5 + 0.5 * min(density / DENSITY_SATURATION, 1.0)
+    return weight * count_factor * density_factor
+
+
+def normalize_text(text: str) -> str:
+    return text.strip().lower()
+
+
+# =========================
+# Stage Hooks
+# =========================
+# analyze_text runs as a sequence of named stages. Hooks registered here get
+# before/after callbacks for every stage; with no hooks registered stages are
+# called directly, without any timing overhead.
+STAGES = ("normalize", "match", "score", "classify", "confidence", "log", "build")
+CALLER_STAGES = ("serialize",)  # run by callers around analyze_text
+
+
+class StageHook:
+    """Base class for stage hooks; override either callback."""
+
+    def before_stage(self, stage: str) -> None:
+        pass
+
+    def after_stage(self, stage: str, elapsed_ns: int) -> None:
+        pass
+
+
+STAGE_HOOKS: List[StageHook] = []
+
+
+def add_stage_hook(hook: StageHook) -> None:
+    STAGE_HOOKS.append(hook)
+
+
+def remove_stage_hook(hook: StageHook) -> None:
+    if hook in STAGE_HOOKS:
+        STAGE_HOOKS.remove(hook)
+
+
+def run_stage(stage: str, fn: Callable[..., Any], *args: Any) -> Any:
+    if not STAGE_HOOKS:
+        return fn(*args)
+
+    hooks = list(STAGE_HOOKS)
+    for hook in hooks:
+        hook.before_stage(stage)
+    start = time.perf_counter_ns()
+    try:
+        return fn(*args)
+    finally:
+        elapsed = time.perf_counter_ns() - start
+        for hook in hooks:
+            hook.after_stage(stage, elapsed)
+
+
 # =========================
 # Error Response Helper
 # =========================
@@ -146,10 +279,276 @@ def error_response(code: str, message: str) -> Dict[str, Any]:
     }
 
 
+# =========================
+# Analysis Stages
+# =========================
+def prepare_text(text: str) -> Tuple[str, bool]:
+    """Normalize text and apply F-03 truncation. Returns (text, truncated)."""
+    text = normalize_text(text)
+
+    # =========================
+    # F-03: EXCESSIVE LENGTH
+    # =========================
+    if len(text) > MAX_TEXT_LENGTH:
+        logger.warning(
+            "Input truncated | original_length=%d | max_length=%d",
+            len(text), MAX_TEXT_LENGTH
+        )
+        return text[:MAX_TEXT_LENGTH], True
+    return text, False
+
+
+def match_keywords(
+    text: str,
+    scoring_profile: ScoringProfile,
+    deadline_ns: Optional[int] = None
+) -> Tuple[Dict[str, List[int]], int]:
+    """Run the profile's compiled matcher. Returns (hits, scanned_length)."""
+    # =========================
+    # F-09: DEADLINE EXCEEDED
+    # =========================
+    # Checked before matching and every few hundred tokens inside it;
+    # on expiry only the scanned prefix of the text is scored.
+    if deadline_ns is not None and time.perf_counter_ns() > deadline_ns:
+        return {}, 0
+    return get_matcher(scoring_profile.lexicon).scan(text, deadline_ns)
+
+
+def score_categories(
+    counts: Dict[str, int],
+    processed_length: int,
+    scoring_profile: ScoringProfile,
+    scoring_mode: str
+) -> Tuple[float, List[str], List[str], set]:
+    """
+    Turn per-keyword hit counts into a capped total score.
+    Returns (total_score, reasons, matched_keywords, matched_categories).
+    """
+    total_score = 0.0
+    reasons = []
+
+    matched_keywords = []
+    matched_categories = set()
+
+    for category, keywords in scoring_profile.scored_categories():
+        category_score = 0.0
+
+        for keyword in keywords:
+            if keyword in counts:
+                count = counts[keyword]
+                logger.info(
+                    "Keyword detected | category=%s | keyword=%s | count=%d",
+                    category, keyword, count
+                )
+                category_score += keyword_contribution(
+                    scoring_profile.keyword_weight, count, max(processed_length, 1), scoring_mode
+                )
+                matched_keywords.append(keyword)
+                matched_categories.add(category)
+                if scoring_mode == SCORING_MODE_DENSITY:
+                    reasons.append(f"Detected {category} keyword: {keyword} (x{count})")
+                else:
+                    reasons.append(f"Detected {category} keyword: {keyword}")
+
+        # =========================
+        # F-04: CATEGORY SATURATION
+        # =========================
+        if category_score > scoring_profile.max_category_score:
+            logger.warning(
+                "Category score capped | category=%s | raw_score=%.2f | cap=%.2f",
+                category, category_score, scoring_profile.max_category_score
+            )
+            category_score = scoring_profile.max_category_score
+
+        total_score += category_score
+
+    # =========================
+    # F-06: SCORE CLAMPING
+    # =========================
+    if total_score > 1.0:
+        logger.warning(
+            "Total score clamped | raw_score=%.2f | cap=1.0",
+            total_score
+        )
+        total_score = 1.0
+
+    return total_score, reasons, matched_keywords, matched_categories
+
+
+def classify_score(total_score: float, scoring_profile: ScoringProfile) -> str:
+    # =========================
+    # RISK THRESHOLDS
+    # =========================
+    if total_score < scoring_profile.medium_threshold:
+        return "LOW"
+    elif total_score < scoring_profile.high_threshold:
+        return "MEDIUM"
+    return "HIGH"
+
+
+def compute_confidence(matched_keywords: List[str], matched_categories: set) -> float:
+    # =========================
+    # CONFIDENCE LOGIC (TASK 3 - DAY 2)
+    # =========================
+    confidence = 1.0
+    keyword_count = len(matched_keywords)
+    category_count = len(matched_categories)
+
+    if keyword_count == 0:
+        confidence = 1.0
+    else:
+        if keyword_count == 1:
+            confidence -= 0.3
+        if category_count > 1:
+            confidence -= 0.2
+        if keyword_count <= 2:
+            confidence -= 0.2
+
+    return max(0.0, min(confidence, 1.0))
+
+
+def log_decision(total_score: float, confidence: float, risk_category: str) -> None:
+    logger.info(
+        "Final decision | score=%.2f | confidence=%.2f | category=%s",
+        total_score, confidence, risk_category
+    )
+
+
+def build_result(
+    total_score: float,
+    confidence: float,
+    risk_category: str,
+    reasons: List[str],
+    processed_length: int,
+    truncated: bool
+) -> Dict[str, Any]:
+    if truncated:
+        reasons.append("Input text was truncated to safe maximum length")
+
+    return {
+        "risk_score": round(total_score, 2),
+        "confidence_score": round(confidence, 2),
+        "risk_category": risk_category,
+        "trigger_reasons": reasons,
+        "processed_length": processed_length,
+        "errors": None
+    }
+
+
+# =========================
+# Result Cache Hooks
+# =========================
+# An optional shared cache (see app/cache.py) consulted read-through by
+# analyze_text and analyze_batch. Deadline-bound and error results are never
+# cached.
+RESULT_CACHE = None
+
+
+def set_result_cache(cache) -> None:
+    global RESULT_CACHE
+    RESULT_CACHE = cache
+
+
+def config_hash(scoring_profile: ScoringProfile, scoring_mode: str) -> str:
+    config = (
+        scoring_profile.keyword_weight,
+        scoring_profile.max_category_score,
+        scoring_profile.medium_threshold,
+        scoring_profile.high_threshold,
+        scoring_profile.categories,
+        scoring_mode,
+        MAX_TEXT_LENGTH,
+        MAX_COUNT_FACTOR,
+        DENSITY_SATURATION,
+    )
+    return hashlib.sha256(repr(config).encode("utf-8")).hexdigest()[:16]
+
+
+def result_cache_key(
+    text: Any,
+    profile: Union[str, ScoringProfile, None] = DEFAULT_PROFILE,
+    scoring_mode: Optional[str] = None
+) -> Optional[Tuple[str, str, str]]:
+    """
+    (lexicon version, scoring config hash, normalized-text hash), or None
+    when the request is invalid and should not touch the cache.
+    """
+    if not isinstance(text, str):
+        return None
+    if profile is not None and not isinstance(profile, (str, ScoringProfile)):
+        return None
+    scoring_profile = get_profile(profile)
+    if scoring_profile is None:
+        return None
+    if scoring_mode is None:
+        scoring_mode = scoring_profile.scoring_mode
+    if scoring_mode not in SCORING_MODES:
+        return None
+
+    text_hash = hashlib.sha256(
+        normalize_text(text).encode("utf-8", "surrogatepass")
+    ).hexdigest()
+    return (
+        lexicon_version(scoring_profile.lexicon),
+        config_hash(scoring_profile, scoring_mode),
+        text_hash
+    )
+
+
+def cached_results(
+    cache,
+    keys: List[Optional[Tuple[str, str, str]]]
+) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    try:
+        return cache.get_many(key for key in keys if key is not None)
+    except Exception:
+        logger.warning("Result cache read failed; computing results", exc_info=True)
+        return {}
+
+
+def store_results(
+    cache,
+    items: List[Tuple[Optional[Tuple[str, str, str]], Dict[str, Any]]]
+) -> None:
+    try:
+        cache.put_many(
+            (key, result) for key, result in items
+            if key is not None and result["errors"] is None
+        )
+    except Exception:
+        logger.warning("Result cache write failed", exc_info=True)
+
+
 # =========================
 # Core Analysis Function
 # =========================
-def analyze_text(text: str) -> Dict[str, Any]:
+def analyze_text(
+    text: str,
+    profile: Union[str, ScoringProfile, None] = DEFAULT_PROFILE,
+    scoring_mode: Optional[str] = None,
+    deadline_ms: Optional[float] = None
+) -> Dict[str, Any]:
+    cache = RESULT_CACHE
+    if cache is None or deadline_ms is not None:
+        return compute_analysis(text, profile, scoring_mode, deadline_ms)
+
+    key = result_cache_key(text, profile, scoring_mode)
+    cached = cached_results(cache, [key])
+    if key in cached:
+        return cached[key]
+
+    result = compute_analysis(text, profile, scoring_mode)
+    store_results(cache, [(key, result)])
+    return result
+
+
+def compute_analysis(
+    text: str,
+    profile: Union[str, ScoringProfile, None] = DEFAULT_PROFILE,
+    scoring_mode: Optional[str] = None,
+    deadline_ms: Optional[float] = None
+) -> Dict[str, Any]:
+    start_ns = time.perf_counter_ns()
     try:
         # =========================
         # F-02: INVALID TYPE
@@ -157,10 +556,27 @@ def analyze_text(text: str) -> Dict[str, Any]:
         if not isinstance(text, str):
             return error_response("INVALID_TYPE", "Input must be a string")
 
+        scoring_profile = get_profile(profile)
+        if scoring_profile is None:
+            return error_response("UNKNOWN_PROFILE", f"Unknown scoring profile: {profile}")
+
+        if scoring_mode is None:
+            scoring_mode = scoring_profile.scoring_mode
+        if scoring_mode not in SCORING_MODES:
+            return error_response("INVALID_SCORING_MODE", f"Unknown scoring mode: {scoring_mode}")
+
+        deadline_ns = None
+        if deadline_ms is not None:
+            if isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) \
+                    or not math.isfinite(deadline_ms) or not deadline_ms > 0:
+                return error_response(
+                    "INVALID_DEADLINE", "deadline_ms must be a positive finite number"
+                )
+            deadline_ns = start_ns + int(deadline_ms * 1_000_000)
+
         logger.info("Received text for analysis (raw_length=%d)", len(text))
 
-        # Normalize input
-        text = text.strip().lower()
+        text, truncated = run_stage("normalize", prepare_text, text)
 
         # =========================
         # F-01: EMPTY INPUT
@@ -168,109 +584,46 @@ def analyze_text(text: str) -> Dict[str, Any]:
         if not text:
             return error_response("EMPTY_INPUT", "Text is empty")
 
-        # =========================
-        # F-03: EXCESSIVE LENGTH
-        # =========================
-        truncated = False
-        if len(text) > MAX_TEXT_LENGTH:
-            logger.warning(
-                "Input truncated | original_length=%d | max_length=%d",
-                len(text), MAX_TEXT_LENGTH
-            )
-            text = text[:MAX_TEXT_LENGTH]
-            truncated = True
-
-        total_score = 0.0
-        reasons = []
-
-        matched_keywords = []
-        matched_categories = set()
-
         # =========================
         # CORE MATCHING LOGIC
         # =========================
-        for category, keywords in RISK_KEYWORDS.items():
-            category_score = 0.0
-
-            for keyword in keywords:
-                pattern = r"\b" + re.escape(keyword) + r"\b"
-                if re.search(pattern, text):
-                    logger.info(
-                        "Keyword detected | category=%s | keyword=%s",
-                        category, keyword
-                    )
-                    category_score += KEYWORD_WEIGHT
-                    matched_keywords.append(keyword)
-                    matched_categories.add(category)
-                    reasons.append(f"Detected {category} keyword: {keyword}")
+        found, scanned = run_stage("match", match_keywords, text, scoring_profile, deadline_ns)
 
-            # =========================
-            # F-04: CATEGORY SATURATION
-            # =========================
-            if category_score > MAX_CATEGORY_SCORE:
-                logger.warning(
-                    "Category score capped | category=%s | raw_score=%.2f | cap=%.2f",
-                    category, category_score, MAX_CATEGORY_SCORE
-                )
-                category_score = MAX_CATEGORY_SCORE
-
-            total_score += category_score
-
-        # =========================
-        # F-06: SCORE CLAMPING
-        # =========================
-        if total_score > 1.0:
+        partial = scanned < len(text)
+        if partial:
             logger.warning(
-                "Total score clamped | raw_score=%.2f | cap=1.0",
-                total_score
+                "Deadline exceeded | deadline_ms=%s | scanned=%d | length=%d",
+                deadline_ms, scanned, len(text)
             )
-            total_score = 1.0
-
-        # =========================
-        # RISK THRESHOLDS
-        # =========================
-        if total_score < 0.3:
-            risk_category = "LOW"
-        elif total_score < 0.7:
-            risk_category = "MEDIUM"
-        else:
-            risk_category = "HIGH"
+            text = text[:scanned]
 
-        # =========================
-        # CONFIDENCE LOGIC (TASK 3 - DAY 2)
-        # =========================
-        confidence = 1.0
-        keyword_count = len(matched_keywords)
-        category_count = len(matched_categories)
+        total_score, reasons, matched_keywords, matched_categories = run_stage(
+            "score", score_categories,
+            {keyword: len(positions) for keyword, positions in found.items()},
+            len(text), scoring_profile, scoring_mode
+        )
+        risk_category = run_stage("classify", classify_score, total_score, scoring_profile)
+        confidence = run_stage(
+            "confidence", compute_confidence, matched_keywords, matched_categories
+        )
+        run_stage("log", log_decision, total_score, confidence, risk_category)
 
-        if keyword_count == 0:
-            confidence = 1.0
-        else:
-            if keyword_count == 1:
-                confidence -= 0.3
-            if category_count > 1:
-                confidence -= 0.2
-            if keyword_count <= 2:
-                confidence -= 0.2
-
-        confidence = max(0.0, min(confidence, 1.0))
-
-        logger.info(
-            "Final decision | score=%.2f | confidence=%.2f | category=%s",
-            total_score, confidence, risk_category
+        result = run_stage(
+            "build", build_result,
+            total_score, confidence, risk_category, reasons, len(text), truncated
         )
 
-        if truncated:
-            reasons.append("Input text was truncated to safe maximum length")
+        if deadline_ns is not None:
+            if partial:
+                reasons.append("Deadline exceeded; only the processed prefix was scored")
+                result["errors"] = {
+                    "error_code": "DEADLINE_EXCEEDED",
+                    "message": f"Analysis exceeded deadline of {deadline_ms} ms"
+                }
+            result["partial"] = partial
+            result["elapsed_ms"] = round((time.perf_counter_ns() - start_ns) / 1_000_000, 3)
 
-        return {
-            "risk_score": round(total_score, 2),
-            "confidence_score": round(confidence, 2),
-            "risk_category": risk_category,
-            "trigger_reasons": reasons,
-            "processed_length": len(text),
-            "errors": None
-        }
+        return result
 
     # =========================
     # F-07: UNEXPECTED FAILURE
@@ -285,6 +638,45 @@ def analyze_text(text: str) -> Dict[str, Any]:
             "Unexpected processing error"
         )
 
+
+# =========================
+# Batch Analysis
+# =========================
+def analyze_batch(
+    texts: List[str],
+    profile: Union[str, ScoringProfile, None] = DEFAULT_PROFILE,
+    scoring_mode: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Analyze texts in order; every input gets its own result or error.
+    With a result cache set, hits are fetched and misses stored in bulk.
+    """
+    cache = RESULT_CACHE
+    if cache is None:
+        return [compute_analysis(text, profile, scoring_mode) for text in texts]
+
+    keys = [result_cache_key(text, profile, scoring_mode) for text in texts]
+    cached = cached_results(cache, keys)
+
+    results = []
+    misses = {}
+    seen = set()
+    for text, key in zip(texts, keys):
+        if key in cached or key in misses:
+            # Repeated texts get their own copy so callers can mutate results
+            result = cached[key] if key in cached else misses[key]
+            results.append(dict(result) if key in seen else result)
+            seen.add(key)
+        else:
+            result = compute_analysis(text, profile, scoring_mode)
+            results.append(result)
+            if key is not None:
+                misses[key] = result
+                seen.add(key)
+
+    store_results(cache, list(misses.items()))
+    return results
+
 #     adversarial_flags = detect_adversarial_patterns(text)
 #     return {
 #     "risk_score": round(total_score, 2),
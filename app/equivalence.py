@@ -0,0 +1,411 @@
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.engine import (
+    KEYWORD_WEIGHT,
+    MAX_CATEGORY_SCORE,
+    MAX_TEXT_LENGTH,
+    RISK_KEYWORDS,
+    analyze_batch,
+    analyze_text,
+    error_response,
+    set_result_cache,
+)
+
+# =========================
+# Golden-Corpus Equivalence Checker
+# =========================
+# python -m app.equivalence --size 20000 --seed 0
+#
+# Runs a generated corpus through the reference implementation (the
+# original per-keyword re.search loop) and through every optimized engine
+# mode, reports any output that differs, and prints a speedup table. Exits
+# non-zero when any mode disagrees with the reference.
+
+MODES = ("single", "batch", "pipelined", "streamed", "process", "cached")
+CHUNK_SIZE = 256
+FILLER_WORDS = [
+    "the", "a", "message", "today", "friends", "studies", "skill", "killer",
+    "scammers", "hello", "time", "you", "my", "life", "back", "card",
+]
+PUNCTUATION = [".", ",", "!", "?", "'", '"', "-", "_", "(", ")", "/", ":", "#", "0", "a", "é", "́"]
+WHITESPACE = [" ", "  ", "\t", "\n", " "]
+
+
+# =========================
+# Reference Implementation
+# =========================
+def reference_analyze_text(text: Any) -> Dict[str, Any]:
+    """The original analyze_text matching loop, kept as the golden reference."""
+    try:
+        if not isinstance(text, str):
+            return error_response("INVALID_TYPE", "Input must be a string")
+
+        text = text.strip().lower()
+        if not text:
+            return error_response("EMPTY_INPUT", "Text is empty")
+
+        truncated = False
+        if len(text) > MAX_TEXT_LENGTH:
+            text = text[:MAX_TEXT_LENGTH]
+            truncated = True
+
+        total_score = 0.0
+        reasons = []
+        matched_keywords = []
+        matched_categories = set()
+
+        for category, keywords in RISK_KEYWORDS.items():
+            category_score = 0.0
+            for keyword in keywords:
+                pattern = r"\b" + re.escape(keyword) + r"\b"
+                if re.search(pattern, text):
+                    category_score += KEYWORD_WEIGHT
+                    matched_keywords.append(keyword)
+                    matched_categories.add(category)
+                    reasons.append(f"Detected {category} keyword: {keyword}")
+            if category_score > MAX_CATEGORY_SCORE:
+                category_score = MAX_CATEGORY_SCORE
+            total_score += category_score
+
+        if total_score > 1.0:
+            total_score = 1.0
+
+        if total_score < 0.3:
+            risk_category = "LOW"
+        elif total_score < 0.7:
+            risk_category = "MEDIUM"
+        else:
+            risk_category = "HIGH"
+
+        confidence = 1.0
+        keyword_count = len(matched_keywords)
+        category_count = len(matched_categories)
+        if keyword_count == 0:
+            confidence = 1.0
+        else:
+            if keyword_count == 1:
+                confidence -= 0.3
+            if category_count > 1:
+                confidence -= 0.2
+            if keyword_count <= 2:
+                confidence -= 0.2
+        confidence = max(0.0, min(confidence, 1.0))
+
+        if truncated:
+            reasons.append("Input text was truncated to safe maximum length")
+
+        return {
+            "risk_score": round(total_score, 2),
+            "confidence_score": round(confidence, 2),
+            "risk_category": risk_category,
+            "trigger_reasons": reasons,
+            "processed_length": len(text),
+            "errors": None
+        }
+    except Exception:
+        return error_response("INTERNAL_ERROR", "Unexpected processing error")
+
+
+# =========================
+# Corpus Generation
+# =========================
+def all_keywords() -> List[str]:
+    return list(dict.fromkeys(keyword for keywords in RISK_KEYWORDS.values() for keyword in keywords))
+
+
+def cross_category_keywords() -> List[str]:
+    seen: Dict[str, int] = {}
+    for keywords in RISK_KEYWORDS.values():
+        for keyword in set(keywords):
+            seen[keyword] = seen.get(keyword, 0) + 1
+    return sorted(keyword for keyword, count in seen.items() if count > 1)
+
+
+def boundary_cases() -> List[Any]:
+    """Hand-picked inputs at the edges of matching, truncation and validation."""
+    cases: List[Any] = [
+        None, 123, 4.5, ["kill"], "", "   ", "\n\t",
+        "kill", "KILL", " Kill ", "kill's", "kill_", "_kill", "kill2", "2kill",
+        "skill", "killer", "kill-time", "kill.time", "kilĺ", "éscam", "scamé",
+        "kill myself", "kill  myself", "kill\tmyself", "kill\nmyself", "kill myselfish",
+        "i will kill you", "i will kill you will die", "you are dead dead",
+        "go die", "studies", "sexual assault", "minor sexual assault",
+        "crypto scam scam", "credit card fraud", "overdose myself",
+        "gun bomb knife terrorist", "a gun. a bomb! a knife?",
+    ]
+
+    keyword = "scam"
+    for length in (MAX_TEXT_LENGTH - 1, MAX_TEXT_LENGTH, MAX_TEXT_LENGTH + 1):
+        cases.append("x " * ((length - len(keyword)) // 2) + keyword)
+        cases.append(keyword + " x" * ((length - len(keyword)) // 2))
+    for split in range(1, len("kill myself")):
+        filler = "a" * (MAX_TEXT_LENGTH - split - 1)
+        cases.append(filler + " kill myself")
+        cases.append("   " + filler + " kill myself")
+    cases.append("kill " * 2000)
+    cases.append(" " * (MAX_TEXT_LENGTH + 10) + "scam")
+    return cases
+
+
+def generate_corpus(size: int, seed: int = 0) -> List[Any]:
+    """Boundary cases first, then seeded random inputs up to ``size``."""
+    rng = random.Random(seed)
+    keywords = all_keywords()
+    multi_word = [keyword for keyword in keywords if " " in keyword]
+    shared = cross_category_keywords()
+    corpus = boundary_cases()
+
+    while len(corpus) < size:
+        kind = rng.random()
+        if kind < 0.3:
+            # Punctuation and word characters glued to keywords
+            parts = [
+                rng.choice(PUNCTUATION) * rng.randint(0, 1) + rng.choice(keywords)
+                + rng.choice(PUNCTUATION) * rng.randint(0, 1)
+                for _ in range(rng.randint(1, 5))
+            ]
+            text = rng.choice(WHITESPACE).join(parts)
+        elif kind < 0.5:
+            # Overlapping phrases and their component words
+            phrase = rng.choice(multi_word)
+            words = phrase.split(" ")
+            pieces = [phrase, rng.choice(words), " ".join(words[:-1]), " ".join(words[1:])]
+            text = rng.choice(WHITESPACE).join(rng.sample(pieces, rng.randint(2, 4)))
+        elif kind < 0.6:
+            # Terms shared by several categories
+            text = " ".join(rng.choice(shared) for _ in range(rng.randint(1, 6)))
+        elif kind < 0.7:
+            # Keyword straddling the truncation boundary
+            keyword = rng.choice(keywords)
+            offset = rng.randint(-len(keyword) - 2, 2)
+            text = "z" * (MAX_TEXT_LENGTH + offset - 1) + " " + keyword
+        else:
+            # Mixed prose
+            words = FILLER_WORDS + keywords
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 40)))
+
+        if rng.random() < 0.2:
+            text = text.upper()
+        if rng.random() < 0.1:
+            text = rng.choice(WHITESPACE) + text + rng.choice(WHITESPACE)
+        corpus.append(text)
+
+    return corpus
+
+
+# =========================
+# Engine Modes
+# =========================
+def chunks(items: List[Any], size: int = CHUNK_SIZE) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_reference(corpus: List[Any]) -> List[Dict[str, Any]]:
+    return [reference_analyze_text(text) for text in corpus]
+
+
+def run_single(corpus: List[Any]) -> List[Dict[str, Any]]:
+    return [analyze_text(text) for text in corpus]
+
+
+def run_batch(corpus: List[Any]) -> List[Dict[str, Any]]:
+    return [result for chunk in chunks(corpus) for result in analyze_batch(chunk)]
+
+
+def run_process(corpus: List[Any]) -> List[Dict[str, Any]]:
+    with ProcessPoolExecutor(max_workers=os.cpu_count() or 2) as pool:
+        return [result for batch in pool.map(analyze_batch, chunks(corpus)) for result in batch]
+
+
+@contextlib.contextmanager
+def loopback_client() -> Iterator[Any]:
+    """Binary transport client connected to a server on a private event loop."""
+    from app.transport import TransportClient, start_tcp_server
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(start_tcp_server("127.0.0.1", 0), loop).result()
+    try:
+        port = server.sockets[0].getsockname()[1]
+        with TransportClient.connect_tcp("127.0.0.1", port) as client:
+            yield client
+    finally:
+        async def shutdown():
+            server.close()
+            await server.wait_closed()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def frame_chunks(corpus: List[Any]) -> Iterator[List[Any]]:
+    """Split the corpus into batches whose request frame stays under the limit."""
+    from app.transport import MAX_FRAME_SIZE
+
+    budget = MAX_FRAME_SIZE // 2  # headroom for codec overhead
+    chunk: List[Any] = []
+    size = 0
+    for text in corpus:
+        # worst case 4 bytes per character, plus quoting
+        text_size = 4 * len(text) + 16 if isinstance(text, str) else 16
+        if chunk and size + text_size > budget:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += text_size
+    if chunk:
+        yield chunk
+
+
+def run_pipelined(corpus: List[Any]) -> List[Dict[str, Any]]:
+    """Pipeline every text as its own request through the binary transport."""
+    with loopback_client() as client:
+        return list(client.analyze_many(corpus))
+
+
+def run_streamed(corpus: List[Any]) -> List[Dict[str, Any]]:
+    """Send the corpus as streamed batch requests over the binary transport."""
+    results: List[Dict[str, Any]] = []
+    with loopback_client() as client:
+        for chunk in frame_chunks(corpus):
+            results.extend(client.stream_batch(chunk))
+    return results
+
+
+def run_cached(corpus: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Fill a fresh result cache, then score the corpus again from it; the
+    timing covers both the cold and the warm pass.
+    """
+    from app.cache import ResultCache
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(os.path.join(directory, "results.db"), max_entries=len(corpus) + 1)
+        set_result_cache(cache)
+        try:
+            run_batch(corpus)
+            return run_batch(corpus)
+        finally:
+            set_result_cache(None)
+            cache.close()
+
+
+MODE_RUNNERS: Dict[str, Callable[[List[Any]], List[Dict[str, Any]]]] = {
+    "single": run_single,
+    "batch": run_batch,
+    "pipelined": run_pipelined,
+    "streamed": run_streamed,
+    "process": run_process,
+    "cached": run_cached,
+}
+
+
+# =========================
+# Comparison & Reporting
+# =========================
+def find_differences(
+    corpus: List[Any],
+    expected: List[Dict[str, Any]],
+    actual: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    if len(expected) != len(actual):
+        return [{"index": None, "fields": ["length"], "expected": len(expected), "actual": len(actual)}]
+
+    differences = []
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        if want != got:
+            fields = sorted(key for key in set(want) | set(got) if want.get(key) != got.get(key))
+            differences.append({
+                "index": index,
+                "text": repr(corpus[index])[:120],
+                "fields": fields,
+                "expected": {key: want.get(key) for key in fields},
+                "actual": {key: got.get(key) for key in fields},
+            })
+    return differences
+
+
+def check_equivalence(
+    corpus: List[Any],
+    modes: Tuple[str, ...] = MODES
+) -> Dict[str, Any]:
+    """Time the reference and each mode over ``corpus`` and diff the outputs."""
+    start = time.perf_counter()
+    expected = run_reference(corpus)
+    reference_s = time.perf_counter() - start
+
+    report: Dict[str, Any] = {"size": len(corpus), "reference_s": reference_s, "modes": {}}
+    for mode in modes:
+        start = time.perf_counter()
+        actual = MODE_RUNNERS[mode](corpus)
+        elapsed = time.perf_counter() - start
+        report["modes"][mode] = {
+            "seconds": elapsed,
+            "speedup": reference_s / elapsed if elapsed > 0 else float("inf"),
+            "differences": find_differences(corpus, expected, actual),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Any], max_differences: int = 10) -> None:
+    size = report["size"]
+    print(f"{'mode':<12}{'seconds':>10}{'items/s':>12}{'speedup':>10}{'diffs':>8}")
+    print(f"{'reference':<12}{report['reference_s']:>10.3f}{size / report['reference_s']:>12.0f}"
+          f"{1.0:>9.2f}x{0:>8}")
+    for mode, entry in report["modes"].items():
+        print(
+            f"{mode:<12}{entry['seconds']:>10.3f}{size / entry['seconds']:>12.0f}"
+            f"{entry['speedup']:>9.2f}x{len(entry['differences']):>8}"
+        )
+
+    for mode, entry in report["modes"].items():
+        for difference in entry["differences"][:max_differences]:
+            print(f"\n[{mode}] index={difference['index']} text={difference.get('text')}")
+            print(f"  expected: {difference['expected']}")
+            print(f"  actual:   {difference['actual']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.equivalence")
+    parser.add_argument("--size", type=int, default=20000, help="Corpus size (default: 20000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help=f"Comma-separated modes (default: {','.join(MODES)})")
+    parser.add_argument("--keep-logs", action="store_true",
+                        help="Keep engine logging enabled while timing")
+    args = parser.parse_args(argv)
+
+    modes = tuple(mode for mode in args.modes.split(",") if mode)
+    unknown = [mode for mode in modes if mode not in MODE_RUNNERS]
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(unknown)}")
+
+    if not args.keep_logs:
+        logging.disable(logging.CRITICAL)
+
+    report = check_equivalence(generate_corpus(args.size, args.seed), modes)
+    print_report(report)
+    return 1 if any(entry["differences"] for entry in report["modes"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
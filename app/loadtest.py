@@ -0,0 +1,521 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# =========================
+# HTTP Load Generator
+# =========================
+# python -m app.loadtest --workers 1,2,4 --concurrency 1,8,32,128 --duration 10
+# python -m app.loadtest --url http://10.0.0.5:8000 --concurrency 8,64 --rate 2000
+#
+# Drives POST /analyze through the full HTTP stack at each concurrency level,
+# either against a URL or against a local `uvicorn --workers N` started per
+# worker count. Each step reports throughput, latency percentiles and error
+# rate. The run also reports the saturation point per worker count: the
+# concurrency beyond which throughput gains stay under SATURATION_GAIN.
+# Results are written as JSON; pass a previous file to --compare to diff runs.
+#
+# Uses a small keep-alive HTTP/1.1 client on asyncio streams, so the harness
+# needs nothing beyond the service's own dependencies.
+
+DEFAULT_CORPUS = [
+    "this is a normal message",
+    "kill and scam",
+    "this is a scam and hack attempt",
+    "i will kill you, watch your back",
+    "buy cheap drugs from a dealer",
+    "studies show reading helps",
+]
+MAX_STDERR_CHARS = 4000  # server output quoted when a local start fails
+SATURATION_GAIN = 0.10  # less than 10% more throughput = saturated
+MAX_ERROR_RATE = 0.01   # steps above this error rate count as saturated
+
+
+# =========================
+# Minimal HTTP/1.1 Client
+# =========================
+class HttpConnection:
+    def __init__(self, host: str, port: int, tls: bool = False):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, ssl=True if self.tls else None
+            )
+
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        )
+        self._writer.write(head.encode("ascii") + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            payload = b""
+            while True:
+                size = int((await self._reader.readline()).strip(), 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                payload += await self._reader.readexactly(size)
+                await self._reader.readline()
+        else:
+            payload = await self._reader.readexactly(int(headers.get("content-length", "0")))
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
+
+
+# =========================
+# Corpus & Statistics
+# =========================
+def load_corpus(path: Optional[str]) -> List[str]:
+    """
+    One text per line. JSON object lines contribute their "text" field, or
+    "body"/"title" for request-style corpora such as requests.jsonl.
+    """
+    if path is None:
+        return list(DEFAULT_CORPUS)
+
+    texts = []
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                texts.append(line)
+                continue
+            if isinstance(record, dict):
+                text = record.get("text") or record.get("body") or record.get("title")
+                if isinstance(text, str):
+                    texts.append(text)
+            elif isinstance(record, str):
+                texts.append(record)
+    if not texts:
+        raise ValueError(f"Corpus {path} contains no texts")
+    return texts
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies_ms: List[float], errors: int, elapsed_s: float) -> Dict[str, Any]:
+    latencies_ms = sorted(latencies_ms)
+    total = len(latencies_ms) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "duration_s": round(elapsed_s, 3),
+        "throughput_rps": round(len(latencies_ms) / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0,
+            "p50": round(percentile(latencies_ms, 0.50), 3),
+            "p90": round(percentile(latencies_ms, 0.90), 3),
+            "p99": round(percentile(latencies_ms, 0.99), 3),
+            "max": round(latencies_ms[-1], 3) if latencies_ms else 0.0,
+        },
+    }
+
+
+def find_saturation(steps: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per worker count, the last concurrency level that still added at least
+    SATURATION_GAIN throughput without exceeding MAX_ERROR_RATE.
+    """
+    by_workers: Dict[str, List[Dict[str, Any]]] = {}
+    for step in steps:
+        by_workers.setdefault(str(step["workers"]), []).append(step)
+
+    saturation = {}
+    for workers, group in by_workers.items():
+        group = sorted(group, key=lambda step: step["concurrency"])
+        best = group[0]
+        for step in group[1:]:
+            if step["error_rate"] > MAX_ERROR_RATE:
+                break
+            if step["throughput_rps"] < best["throughput_rps"] * (1 + SATURATION_GAIN):
+                break
+            best = step
+        saturation[workers] = {
+            "concurrency": best["concurrency"],
+            "throughput_rps": best["throughput_rps"],
+            "p99_ms": best["latency_ms"]["p99"],
+        }
+    return saturation
+
+
+# =========================
+# Load Steps
+# =========================
+async def run_step(
+    host: str,
+    port: int,
+    corpus: List[str],
+    concurrency: int,
+    duration_s: float,
+    rate: Optional[float] = None,
+    path: str = "/analyze",
+    extra_fields: Optional[Dict[str, Any]] = None,
+    tls: bool = False
+) -> Dict[str, Any]:
+    """
+    Run ``concurrency`` keep-alive clients for ``duration_s`` seconds, each
+    sending its next request as soon as the last returns. With ``rate`` set
+    the load is open-loop instead; see run_open_loop.
+    """
+    bodies = [
+        json.dumps(dict(extra_fields or {}, text=text)).encode("utf-8") for text in corpus
+    ]
+    if rate:
+        return await run_open_loop(host, port, bodies, concurrency, duration_s, rate, path, tls)
+
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    end = start + duration_s
+
+    async def client(index: int) -> None:
+        nonlocal errors
+        connection = HttpConnection(host, port, tls)
+        position = index
+        try:
+            while time.perf_counter() < end:
+                body = bodies[position % len(bodies)]
+                position += concurrency
+                sent = time.perf_counter()
+                try:
+                    status, _ = await connection.request("POST", path, body)
+                except (ConnectionError, OSError, ValueError, asyncio.IncompleteReadError):
+                    errors += 1
+                    await connection.close()
+                    continue
+                if status == 200:
+                    latencies.append((time.perf_counter() - sent) * 1000)
+                else:
+                    errors += 1
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_open_loop(
+    host: str,
+    port: int,
+    bodies: List[bytes],
+    concurrency: int,
+    duration_s: float,
+    rate: float,
+    path: str,
+    tls: bool = False
+) -> Dict[str, Any]:
+    """
+    Issue requests on a fixed ``rate`` schedule without waiting for earlier
+    responses, so a slow server cannot throttle the offered load
+    (coordinated omission). Requests go out on idle keep-alive connections;
+    ``concurrency`` connections are opened up front and more are added
+    whenever every connection is busy. Latency is measured from each
+    request's scheduled send time, so time spent queued behind a late
+    schedule counts against the server. The summary adds the requested
+    rate and the rate actually achieved (requests over the whole run,
+    including waiting for the last responses).
+    """
+    latencies: List[float] = []
+    errors = 0
+    idle = [HttpConnection(host, port, tls) for _ in range(concurrency)]
+    connections = list(idle)
+    interval = 1.0 / rate
+    start = time.perf_counter()
+
+    async def send(body: bytes, scheduled: float) -> None:
+        nonlocal errors
+        if idle:
+            connection = idle.pop()
+        else:
+            connection = HttpConnection(host, port, tls)
+            connections.append(connection)
+        try:
+            status, _ = await connection.request("POST", path, body)
+        except (ConnectionError, OSError, ValueError, asyncio.IncompleteReadError):
+            errors += 1
+            await connection.close()
+        else:
+            if status == 200:
+                latencies.append((time.perf_counter() - scheduled) * 1000)
+            else:
+                errors += 1
+        idle.append(connection)
+
+    tasks = []
+    try:
+        for sequence in itertools.count():
+            scheduled = start + sequence * interval
+            if scheduled >= start + duration_s:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(send(bodies[sequence % len(bodies)], scheduled)))
+        await asyncio.gather(*tasks)
+    finally:
+        for connection in connections:
+            await connection.close()
+
+    elapsed = time.perf_counter() - start
+    summary = summarize(latencies, errors, elapsed)
+    summary["requested_rate_rps"] = rate
+    summary["achieved_rate_rps"] = round(len(tasks) / elapsed, 1) if elapsed > 0 else 0.0
+    summary["connections"] = len(connections)
+    return summary
+
+
+# =========================
+# Target Management
+# =========================
+def parse_target(url: str) -> Tuple[str, int, bool, str]:
+    """
+    (host, port, tls, analyze path) for a service base URL such as
+    https://risk.internal:8443/api; the URL path prefixes /analyze.
+    """
+    target = urlsplit(url)
+    if target.scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported URL scheme {target.scheme!r}; use http or https")
+    if not target.hostname:
+        raise ValueError(f"URL has no host: {url}")
+    tls = target.scheme == "https"
+    port = target.port or (443 if tls else 80)
+    return target.hostname, port, tls, target.path.rstrip("/") + "/analyze"
+
+
+# =========================
+# Local Server Management
+# =========================
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(workers: int, port: int) -> List[str]:
+    return [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+
+
+def start_local_server(workers: int, port: int, timeout_s: float = 30.0) -> subprocess.Popen:
+    # stderr goes to an anonymous temp file rather than a pipe, so a chatty
+    # server can never block on a full pipe, yet a failed start can report why
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            server_command(workers, port), stdout=subprocess.DEVNULL, stderr=stderr
+        )
+
+        def failure(reason: str) -> RuntimeError:
+            stderr.seek(0)
+            output = stderr.read().decode("utf-8", "replace").strip()[-MAX_STDERR_CHARS:]
+            return RuntimeError(f"{reason}; stderr:\n{output}" if output else reason)
+
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise failure(f"uvicorn exited with code {process.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                    return process
+            except OSError:
+                time.sleep(0.1)
+        process.terminate()
+        raise failure(f"uvicorn did not start within {timeout_s}s")
+
+
+def stop_local_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# =========================
+# Run Comparison
+# =========================
+def compare_runs(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    old_steps = {(s["workers"], s["concurrency"]): s for s in previous.get("steps", [])}
+    lines = [f"{'workers':>8}{'conc':>6}{'rps':>10}{'Δrps':>9}{'p99_ms':>10}{'Δp99':>9}"]
+    for step in current["steps"]:
+        old = old_steps.get((step["workers"], step["concurrency"]))
+        rps, p99 = step["throughput_rps"], step["latency_ms"]["p99"]
+        if old is None:
+            d_rps = d_p99 = "n/a"
+        else:
+            old_rps, old_p99 = old["throughput_rps"], old["latency_ms"]["p99"]
+            d_rps = f"{(rps - old_rps) / old_rps:+.1%}" if old_rps else "n/a"
+            d_p99 = f"{(p99 - old_p99) / old_p99:+.1%}" if old_p99 else "n/a"
+        lines.append(
+            f"{str(step['workers']):>8}{step['concurrency']:>6}{rps:>10.1f}{d_rps:>9}"
+            f"{p99:>10.2f}{d_p99:>9}"
+        )
+    return lines
+
+
+def print_step(step: Dict[str, Any]) -> None:
+    latency = step["latency_ms"]
+    print(
+        f"workers={step['workers']} concurrency={step['concurrency']} "
+        f"rps={step['throughput_rps']:.1f} p50={latency['p50']:.2f}ms "
+        f"p90={latency['p90']:.2f}ms p99={latency['p99']:.2f}ms "
+        f"errors={step['error_rate']:.2%}"
+        + (
+            f" rate={step['achieved_rate_rps']:.1f}/{step['requested_rate_rps']:.1f}rps"
+            if "achieved_rate_rps" in step else ""
+        ),
+        flush=True
+    )
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.loadtest")
+    parser.add_argument("--url", default=None,
+                        help="Base URL (http or https) of a running service instead of starting one")
+    parser.add_argument("--workers", type=parse_int_list, default=[1],
+                        help="Comma-separated uvicorn worker counts to start locally (default: 1)")
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4, 16, 64],
+                        help="Comma-separated concurrency levels (default: 1,4,16,64)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Open-loop request rate per step; requests are sent on schedule "
+                             "without waiting for responses (default: closed loop)")
+    parser.add_argument("--corpus", default=None, help="Text or JSON lines corpus, e.g. requests.jsonl")
+    parser.add_argument("--scoring-profile", default=None)
+    parser.add_argument("--scoring-mode", default=None)
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--compare", default=None, help="Previous results file to diff against")
+    args = parser.parse_args(argv)
+    if args.url:
+        try:
+            target = parse_target(args.url)
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    corpus = load_corpus(args.corpus)
+    extra_fields = {}
+    if args.scoring_profile:
+        extra_fields["profile"] = args.scoring_profile
+    if args.scoring_mode:
+        extra_fields["scoring_mode"] = args.scoring_mode
+
+    steps = []
+
+    def sweep(
+        host: str, port: int, workers: Optional[int], path: str = "/analyze", tls: bool = False
+    ) -> None:
+        for concurrency in args.concurrency:
+            step = asyncio.run(run_step(
+                host, port, corpus, concurrency, args.duration, args.rate,
+                path=path, extra_fields=extra_fields, tls=tls
+            ))
+            step = dict(workers=workers, concurrency=concurrency, rate=args.rate, **step)
+            steps.append(step)
+            print_step(step)
+
+    if args.url:
+        host, port, tls, path = target
+        sweep(host, port, None, path, tls)
+    else:
+        for workers in args.workers:
+            port = free_port()
+            process = start_local_server(workers, port)
+            try:
+                sweep("127.0.0.1", port, workers)
+            finally:
+                stop_local_server(process)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "target": args.url or "local",
+            "duration_s": args.duration,
+            "rate": args.rate,
+            "corpus": args.corpus or "builtin",
+            "corpus_size": len(corpus),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "steps": steps,
+        "saturation": find_saturation(steps),
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for workers, point in results["saturation"].items():
+        print(
+            f"saturation workers={workers}: concurrency={point['concurrency']} "
+            f"rps={point['throughput_rps']:.1f} p99={point['p99_ms']:.2f}ms"
+        )
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare_runs(json.load(f), results)))
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
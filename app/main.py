@@ -1,12 +1,56 @@
-from fastapi import FastAPI
+import json
+import os
+
+from fastapi import FastAPI, Response
 from app.schemas import InputSchema, OutputSchema
-from app.engine import analyze_text
+from app.engine import add_stage_hook, analyze_text, run_stage, set_result_cache
+from app.cache import ResultCache
+from app.coalesce import SingleFlight, coalesced_call, request_key
 
 app = FastAPI(title="Text Risk Scoring Service")
 
+# Optional result cache shared by all workers, e.g. RISK_RESULT_CACHE=/var/cache/risk.db
+if os.environ.get("RISK_RESULT_CACHE"):
+    set_result_cache(ResultCache(
+        os.environ["RISK_RESULT_CACHE"],
+        max_entries=int(os.environ.get("RISK_RESULT_CACHE_MAX", "100000"))
+    ))
+
+# Optional per-stage timing (totals only) reported by /stats, e.g. RISK_STAGE_TIMING=1
+stage_timer = None
+if os.environ.get("RISK_STAGE_TIMING"):
+    from app.profiling import StageTimer
+    stage_timer = StageTimer(trace=False)
+    add_stage_hook(stage_timer)
+
+# Concurrent identical requests share one analyze_text computation
+analyze_flight = SingleFlight()
+
+# The engine result is serialized here, as the "serialize" stage, instead of
+# by FastAPI; OutputSchema still documents the response. The engine only
+# sets partial/elapsed_ms for deadline-bound requests, so other responses
+# omit them while keeping "errors": null.
 @app.post("/analyze", response_model=OutputSchema)
 def analyze(payload: InputSchema):
-    return analyze_text(payload.text)
+    key = request_key(
+        payload.text, payload.profile, payload.scoring_mode, payload.deadline_ms
+    )
+    result = coalesced_call(
+        analyze_flight,
+        key,
+        lambda: analyze_text(
+            payload.text, payload.profile, payload.scoring_mode, payload.deadline_ms
+        )
+    )
+    return Response(run_stage("serialize", json.dumps, result), media_type="application/json")
+
+
+@app.get("/stats")
+def stats():
+    stats = analyze_flight.stats()
+    if stage_timer is not None:
+        stats["stages"] = stage_timer.breakdown()
+    return stats
 
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# =========================
+# Single-Pass Keyword Matcher
+# =========================
+# Every keyword in the lexicon is a run of word characters, optionally
+# joined by single spaces ("kill", "kill myself"). Matching such a keyword
+# with r"\b<keyword>\b" is equivalent to matching a sequence of whole
+# r"\w+" tokens separated by exactly one space, so the text only needs to
+# be tokenized once and each token looked up in a first-token index.
+# Keywords that do not have this shape fall back to a precompiled regex.
+
+TOKEN_PATTERN = re.compile(r"\w+")
+SIMPLE_KEYWORD_PATTERN = re.compile(r"\w+(?: \w+)*")
+DEADLINE_CHECK_INTERVAL = 256  # tokens between deadline checks
+
+
+class KeywordMatcher:
+    def __init__(self, lexicon: Dict[str, List[str]]):
+        self.keywords: Set[str] = set()
+        # first token -> [(keyword, remaining tokens)]
+        self._index: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {}
+        self._fallback: Dict[str, "re.Pattern[str]"] = {}
+
+        for keywords in lexicon.values():
+            for keyword in keywords:
+                if keyword in self.keywords:
+                    continue
+                self.keywords.add(keyword)
+
+                if SIMPLE_KEYWORD_PATTERN.fullmatch(keyword):
+                    first, *rest = keyword.split(" ")
+                    self._index.setdefault(first, []).append((keyword, tuple(rest)))
+                else:
+                    self._fallback[keyword] = re.compile(
+                        r"(?=\b" + re.escape(keyword) + r"\b)"
+                    )
+
+    def find(self, text: str) -> Dict[str, List[int]]:
+        """
+        Return every lexicon keyword present in ``text`` mapped to the start
+        offsets of its occurrences, so ``len(found[keyword])`` is its count.
+        """
+        return self.scan(text)[0]
+
+    def scan(
+        self,
+        text: str,
+        deadline_ns: Optional[int] = None
+    ) -> Tuple[Dict[str, List[int]], int]:
+        """
+        Like ``find`` but stops tokenizing once ``deadline_ns`` (a
+        ``time.perf_counter_ns`` value) has passed. Returns the hits and the
+        length of text that was scanned; a length below ``len(text)`` means
+        the result only covers that prefix.
+        """
+        found: Dict[str, List[int]] = {}
+        scanned = len(text)
+        index = self._index
+
+        if index:
+            tokens = []
+            for m in TOKEN_PATTERN.finditer(text):
+                tokens.append((m.group(), m.start(), m.end()))
+                if (
+                    deadline_ns is not None
+                    and len(tokens) % DEADLINE_CHECK_INTERVAL == 0
+                    and time.perf_counter_ns() > deadline_ns
+                ):
+                    scanned = m.end()
+                    break
+            token_count = len(tokens)
+
+            for i, (token, start, end) in enumerate(tokens):
+                candidates = index.get(token)
+                if not candidates:
+                    continue
+
+                for keyword, rest in candidates:
+                    if not rest:
+                        found.setdefault(keyword, []).append(start)
+                        continue
+                    if i + len(rest) >= token_count:
+                        continue
+
+                    prev_end = end
+                    for offset, expected in enumerate(rest, start=1):
+                        next_token, next_start, next_end = tokens[i + offset]
+                        if next_token != expected or text[prev_end:next_start] != " ":
+                            break
+                        prev_end = next_end
+                    else:
+                        found.setdefault(keyword, []).append(start)
+
+        for keyword, pattern in self._fallback.items():
+            positions = [m.start() for m in pattern.finditer(text, 0, scanned)]
+            if positions:
+                found[keyword] = positions
+
+        return found, scanned
+
+
+# =========================
+# Compiled Matcher Cache
+# =========================
+# Matchers are keyed on lexicon content, so scoring profiles that share a
+# lexicon also share a single compiled matcher. Building the content key
+# walks every keyword, so it is done once per lexicon object: lookups go
+# through an identity-keyed cache first (entries hold a reference to the
+# lexicon, so its id cannot be reused while cached). Lexicons must not be
+# mutated in place after first use; build a new dict instead, as
+# rescore.py does. Both caches are LRU-bounded so ad-hoc lexicons cannot
+# grow them without limit.
+LexiconKey = Tuple[Tuple[str, Tuple[str, ...]], ...]
+MATCHER_CACHE_SIZE = 64
+
+
+class CompiledLexicon:
+    def __init__(self, lexicon: Dict[str, List[str]], key: LexiconKey):
+        self.matcher = KeywordMatcher(lexicon)
+        # Stable content hash identifying the lexicon across processes
+        self.version = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()[:16]
+
+
+_BY_CONTENT: "OrderedDict[LexiconKey, CompiledLexicon]" = OrderedDict()
+_BY_IDENTITY: "OrderedDict[int, Tuple[Dict[str, List[str]], CompiledLexicon]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def lexicon_key(lexicon: Dict[str, List[str]]) -> LexiconKey:
+    return tuple((category, tuple(keywords)) for category, keywords in lexicon.items())
+
+
+def compile_lexicon(lexicon: Dict[str, List[str]]) -> CompiledLexicon:
+    with _CACHE_LOCK:
+        entry = _BY_IDENTITY.get(id(lexicon))
+        if entry is not None and entry[0] is lexicon:
+            _BY_IDENTITY.move_to_end(id(lexicon))
+            return entry[1]
+
+        key = lexicon_key(lexicon)
+        compiled = _BY_CONTENT.get(key)
+        if compiled is None:
+            compiled = CompiledLexicon(lexicon, key)
+            _BY_CONTENT[key] = compiled
+            if len(_BY_CONTENT) > MATCHER_CACHE_SIZE:
+                _BY_CONTENT.popitem(last=False)
+        else:
+            _BY_CONTENT.move_to_end(key)
+
+        _BY_IDENTITY[id(lexicon)] = (lexicon, compiled)
+        if len(_BY_IDENTITY) > MATCHER_CACHE_SIZE:
+            _BY_IDENTITY.popitem(last=False)
+        return compiled
+
+
+def lexicon_version(lexicon: Dict[str, List[str]]) -> str:
+    """Stable content hash identifying a lexicon across processes."""
+    return compile_lexicon(lexicon).version
+
+
+def get_matcher(lexicon: Dict[str, List[str]]) -> KeywordMatcher:
+    return compile_lexicon(lexicon).matcher
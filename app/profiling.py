@@ -0,0 +1,101 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from app.engine import StageHook, add_stage_hook, remove_stage_hook
+
+# =========================
+# Stage Timing & Profiling
+# =========================
+# StageTimer collects per-stage nanosecond totals plus one trace event per
+# stage call. The JSON it writes is in Chrome trace-event format, so it
+# opens directly in chrome://tracing, Perfetto or speedscope; the .pstats
+# file next to it works with snakeviz, gprof2dot or flameprof.
+
+
+class StageTimer(StageHook):
+    """
+    Safe to register while analyze_text runs on several threads (FastAPI and
+    transport thread pools): each event is derived from its own elapsed time
+    and tagged with the calling thread, so concurrent stages never mix.
+    Pass ``trace=False`` to keep only the per-stage totals, e.g. in a
+    long-running server.
+    """
+
+    def __init__(self, trace: bool = True):
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.trace = trace
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def after_stage(self, stage: str, elapsed_ns: int) -> None:
+        event = None
+        if self.trace:
+            start = time.perf_counter_ns() - elapsed_ns
+            event = {
+                "name": stage,
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": elapsed_ns / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        with self._lock:
+            entry = self.stats.setdefault(
+                stage, {"calls": 0, "total_ns": 0, "min_ns": elapsed_ns, "max_ns": elapsed_ns}
+            )
+            entry["calls"] += 1
+            entry["total_ns"] += elapsed_ns
+            entry["min_ns"] = min(entry["min_ns"], elapsed_ns)
+            entry["max_ns"] = max(entry["max_ns"], elapsed_ns)
+            if event is not None:
+                self.events.append(event)
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: dict(entry, mean_ns=entry["total_ns"] / entry["calls"])
+                for stage, entry in self.stats.items()
+            }
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+        return {"stages": self.breakdown(), "traceEvents": events}
+
+
+@contextmanager
+def profiled(output_prefix: str) -> Iterator[StageTimer]:
+    """
+    Run the enclosed block under cProfile with a StageTimer attached, then
+    write ``<output_prefix>.pstats`` and ``<output_prefix>.json``.
+    """
+    timer = StageTimer()
+    profiler = cProfile.Profile()
+    add_stage_hook(timer)
+    profiler.enable()
+    try:
+        yield timer
+    finally:
+        profiler.disable()
+        remove_stage_hook(timer)
+        profiler.dump_stats(output_prefix + ".pstats")
+        with open(output_prefix + ".json", "w") as f:
+            json.dump(timer.to_json(), f, indent=2)
+
+
+def print_breakdown(timer: StageTimer, output_prefix: str) -> None:
+    print(f"{'stage':<12}{'calls':>8}{'total_ms':>12}{'mean_us':>12}")
+    for stage, entry in timer.breakdown().items():
+        print(
+            f"{stage:<12}{entry['calls']:>8}"
+            f"{entry['total_ns'] / 1e6:>12.3f}{entry['mean_ns'] / 1e3:>12.2f}"
+        )
+    pstats.Stats(output_prefix + ".pstats").sort_stats("cumulative").print_stats(10)
+    print(f"Wrote {output_prefix}.pstats and {output_prefix}.json")
@@ -0,0 +1,254 @@
+import argparse
+import dataclasses
+import json
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from app.engine import (
+    DEFAULT_PROFILE,
+    SCORING_MODES,
+    ScoringProfile,
+    build_result,
+    classify_score,
+    compute_analysis,
+    compute_confidence,
+    get_profile,
+    prepare_text,
+    score_categories,
+)
+from app.matcher import KeywordMatcher
+
+# =========================
+# Differential Rescoring
+# =========================
+# After a lexicon change, stored results only need the *diff* re-checked:
+# hits for keywords the old lexicon already scored are recovered from the
+# stored trigger_reasons, and only keywords that are new to the scored
+# lexicon are searched for in the stored text, using a small matcher built
+# from the diff. The matcher tokenizes the whole text, so a substring test
+# for each diff keyword first rules out (in C) the records that contain
+# none of them, and records that hit no added or removed keyword keep their
+# stored result without being rescored. Scores, categories and confidence are then recomputed from
+# the merged hit counts with the new lexicon, giving the same result a full
+# re-analysis would.
+#
+# Stored results must come from the same profile configuration and scoring
+# mode as the rescoring run (only the lexicon may differ).
+
+REASON_PATTERN = re.compile(r"^Detected (\w+) keyword: (.+?)(?: \(x(\d+)\))?$")
+DEADLINE_ERROR = "DEADLINE_EXCEEDED"
+TRUNCATION_REASON = "Input text was truncated to safe maximum length"
+
+
+def scored_pairs(
+    scoring_profile: ScoringProfile,
+    lexicon: Dict[str, List[str]]
+) -> List[Tuple[str, str]]:
+    """(category, keyword) pairs in the order the profile scores ``lexicon``."""
+    profile = dataclasses.replace(scoring_profile, lexicon=lexicon)
+    return [
+        (category, keyword)
+        for category, keywords in profile.scored_categories()
+        for keyword in keywords
+    ]
+
+
+def lexicon_pairs(
+    scoring_profile: ScoringProfile,
+    lexicon: Dict[str, List[str]]
+) -> Set[Tuple[str, str]]:
+    """(category, keyword) pairs the profile would score with ``lexicon``."""
+    return set(scored_pairs(scoring_profile, lexicon))
+
+
+def changed_keywords(
+    old_lexicon: Dict[str, List[str]],
+    new_lexicon: Dict[str, List[str]],
+    scoring_profile: ScoringProfile,
+    diff: Dict[str, Set[Any]]
+) -> Optional[Set[str]]:
+    """
+    Keywords of the added and removed pairs, or None when the pairs both
+    lexicons share were reordered or duplicated. Only in the first case is
+    a record that hits none of these keywords guaranteed an unchanged result
+    (trigger_reasons follow lexicon order).
+    """
+    kept_old = [
+        pair for pair in scored_pairs(scoring_profile, old_lexicon) if pair not in diff["removed"]
+    ]
+    kept_new = [
+        pair for pair in scored_pairs(scoring_profile, new_lexicon) if pair not in diff["added"]
+    ]
+    if kept_old != kept_new:
+        return None
+    return {keyword for _, keyword in diff["added"] | diff["removed"]}
+
+
+def diff_lexicons(
+    old_lexicon: Dict[str, List[str]],
+    new_lexicon: Dict[str, List[str]],
+    scoring_profile: ScoringProfile
+) -> Dict[str, Set[Any]]:
+    """
+    Return the added and removed (category, keyword) pairs, plus the
+    keywords that must be scanned for because the old lexicon never scored
+    them anywhere.
+    """
+    old_pairs = lexicon_pairs(scoring_profile, old_lexicon)
+    new_pairs = lexicon_pairs(scoring_profile, new_lexicon)
+    added = new_pairs - old_pairs
+    old_keywords = {keyword for _, keyword in old_pairs}
+    return {
+        "added": added,
+        "removed": old_pairs - new_pairs,
+        "scan": {keyword for _, keyword in added if keyword not in old_keywords},
+    }
+
+
+class DiffMatcher(KeywordMatcher):
+    """KeywordMatcher that skips tokenizing texts holding none of its keywords."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._terms = sorted(keywords)
+        super().__init__({"diff": self._terms})
+
+    def find(self, text: str) -> Dict[str, List[int]]:
+        # Substring tests run in C; a miss rules out every whole-word match
+        if not any(term in text for term in self._terms):
+            return {}
+        return super().find(text)
+
+
+def stored_counts(result: Dict[str, Any]) -> Dict[str, int]:
+    """Recover keyword hit counts from a stored result's trigger_reasons."""
+    counts: Dict[str, int] = {}
+    for reason in result.get("trigger_reasons", []):
+        match = REASON_PATTERN.match(reason)
+        if match:
+            counts[match.group(2)] = int(match.group(3) or 1)
+    return counts
+
+
+def rescore_record(
+    text: str,
+    result: Dict[str, Any],
+    diff_matcher: Optional[DiffMatcher],
+    scoring_profile: ScoringProfile,
+    scoring_mode: str,
+    changed_keywords: Optional[Set[str]] = None
+) -> Dict[str, Any]:
+    """
+    Recompute one stored result under ``scoring_profile``'s (new) lexicon.
+    When ``changed_keywords`` (every keyword of an added or removed pair) is
+    given, a record that hits none of them keeps its stored result as is.
+    """
+    errors = result.get("errors")
+    if errors:
+        if errors.get("error_code") == DEADLINE_ERROR:
+            # Partial results have no reliable hit set; analyze from scratch
+            return compute_analysis(text, scoring_profile, scoring_mode)
+        # Input errors (empty, invalid type, ...) do not depend on the lexicon
+        return result
+
+    counts = stored_counts(result)
+    found: Dict[str, List[int]] = {}
+    if diff_matcher is not None:
+        prepared, _ = prepare_text(text)
+        found = diff_matcher.find(prepared)
+    if changed_keywords is not None and not found and changed_keywords.isdisjoint(counts):
+        return result
+    for keyword, positions in found.items():
+        counts[keyword] = len(positions)
+
+    processed_length = result["processed_length"]
+    total_score, reasons, matched_keywords, matched_categories = score_categories(
+        counts, processed_length, scoring_profile, scoring_mode
+    )
+    risk_category = classify_score(total_score, scoring_profile)
+    confidence = compute_confidence(matched_keywords, matched_categories)
+    truncated = TRUNCATION_REASON in result.get("trigger_reasons", [])
+    return build_result(
+        total_score, confidence, risk_category, reasons, processed_length, truncated
+    )
+
+
+def rescore_changed(
+    records: Iterable[Dict[str, Any]],
+    old_lexicon: Dict[str, List[str]],
+    new_lexicon: Dict[str, List[str]],
+    profile: Union[str, ScoringProfile, None] = DEFAULT_PROFILE,
+    scoring_mode: Optional[str] = None,
+    compare: Tuple[str, ...] = ("risk_category",)
+) -> Iterator[Dict[str, Any]]:
+    """
+    Rescore stored ``{"text", "result"}`` records (other keys such as "id"
+    are passed through) and yield only those where a ``compare`` field of
+    the result changed, as ``{..., "result": new, "previous_result": old}``.
+    """
+    base_profile = get_profile(profile)
+    if base_profile is None:
+        raise ValueError(f"Unknown scoring profile: {profile}")
+    if scoring_mode is None:
+        scoring_mode = base_profile.scoring_mode
+    if scoring_mode not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode: {scoring_mode}")
+
+    new_profile = dataclasses.replace(base_profile, lexicon=new_lexicon)
+    diff = diff_lexicons(old_lexicon, new_lexicon, base_profile)
+    if not diff["added"] and not diff["removed"]:
+        return
+    diff_matcher = DiffMatcher(diff["scan"]) if diff["scan"] else None
+    changed = changed_keywords(old_lexicon, new_lexicon, base_profile, diff)
+
+    for record in records:
+        previous = record["result"]
+        new_result = rescore_record(
+            record["text"], previous, diff_matcher, new_profile, scoring_mode, changed
+        )
+        if any(new_result.get(field) != previous.get(field) for field in compare):
+            yield dict(record, result=new_result, previous_result=previous)
+
+
+# =========================
+# Command Line Entry Point
+# =========================
+# python -m app.rescore --old old_lexicon.json --new new_lexicon.json records.jsonl
+#
+# Lexicon files map category -> [keywords]. Each input line is a JSON
+# record with "text" and the stored "result"; changed records are written
+# to stdout as JSON lines.
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.rescore")
+    parser.add_argument("records", help="JSON lines file of {text, result} records ('-' for stdin)")
+    parser.add_argument("--old", required=True, help="Lexicon the stored results were scored with")
+    parser.add_argument("--new", required=True, help="Lexicon to rescore with")
+    parser.add_argument("--scoring-profile", default=DEFAULT_PROFILE)
+    parser.add_argument("--scoring-mode", default=None)
+    parser.add_argument(
+        "--compare", default="risk_category",
+        help="Comma-separated result fields whose change marks a record (default: risk_category)"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old_lexicon = json.load(f)
+    with open(args.new) as f:
+        new_lexicon = json.load(f)
+
+    source = sys.stdin if args.records == "-" else open(args.records)
+    try:
+        records = (json.loads(line) for line in source if line.strip())
+        for changed in rescore_changed(
+            records, old_lexicon, new_lexicon, args.scoring_profile, args.scoring_mode,
+            tuple(args.compare.split(","))
+        ):
+            print(json.dumps(changed))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,9 @@ from typing import List, Optional
 
 class InputSchema(BaseModel):
     text: str
+    profile: str = "default"
+    scoring_mode: Optional[str] = None
+    deadline_ms: Optional[float] = None
 
 class ErrorSchema(BaseModel):
     error_code: str
@@ -15,3 +18,5 @@ class OutputSchema(BaseModel):
     confidence_score: float
     processed_length: int
     errors: Optional[ErrorSchema] = None
+    partial: Optional[bool] = None
+    elapsed_ms: Optional[float] = None
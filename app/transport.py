@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import itertools
+import json
+import socket
+import struct
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.engine import (
+    DEFAULT_PROFILE,
+    analyze_batch,
+    analyze_text,
+    error_response,
+    logger,
+    set_result_cache,
+)
+
+try:
+    import msgpack
+except ImportError:  # optional; JSON frames work without it
+    msgpack = None
+
+# =========================
+# Binary Transport
+# =========================
+# Length-prefixed frames over TCP or a Unix socket for internal callers that
+# do not need HTTP/JSON. Every frame is
+#
+#     uint32 payload length | uint8 codec | payload
+#
+# where codec is CODEC_MSGPACK or CODEC_JSON. The server answers each request
+# in the codec it arrived in. Requests on one connection may be pipelined;
+# responses come back in request order and echo the request "id".
+#
+# Requests:
+#   {"id": 1, "op": "analyze", "text": "...", "profile": "default",
+#    "scoring_mode": None, "deadline_ms": None}
+#   {"id": 2, "op": "batch", "texts": ["...", "..."], "stream": False}
+# Responses:
+#   {"id": 1, "result": {...}}
+#   {"id": 2, "results": [{...}, {...}]}
+#   streamed batch: {"id": 2, "index": 0, "result": {...}} ... {"id": 2, "done": True}
+#   frame errors:   {"id": None, "result": <error_response>} with error_code
+#                   INVALID_FRAME or FRAME_TOO_LARGE (always JSON, since the
+#                   frame could not be decoded)
+#   request errors: {"id": 3, "done": True, "result": <error_response>}, e.g.
+#                   INVALID_TYPE or INTERNAL_ERROR; "done" also ends a
+#                   streamed batch that failed partway
+
+FRAME_HEADER = struct.Struct("!IB")
+CODEC_JSON = 1
+CODEC_MSGPACK = 2
+MAX_FRAME_SIZE = 1 << 20  # 1 MiB
+DEFAULT_CODEC = CODEC_MSGPACK if msgpack is not None else CODEC_JSON
+
+
+class TransportError(Exception):
+    pass
+
+
+def encode_payload(message: Dict[str, Any], codec: int) -> bytes:
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise TransportError("msgpack codec requested but msgpack is not installed")
+        return msgpack.packb(message, use_bin_type=True)
+    if codec == CODEC_JSON:
+        return json.dumps(message, separators=(",", ":")).encode("utf-8")
+    raise TransportError(f"Unknown codec: {codec}")
+
+
+def decode_payload(payload: bytes, codec: int) -> Any:
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise TransportError("msgpack codec requested but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(payload.decode("utf-8"))
+    raise TransportError(f"Unknown codec: {codec}")
+
+
+def pack_frame(message: Dict[str, Any], codec: int) -> bytes:
+    payload = encode_payload(message, codec)
+    return FRAME_HEADER.pack(len(payload), codec) + payload
+
+
+# =========================
+# Request Handling
+# =========================
+# Engine calls run in the default thread pool so one connection's batch
+# never stalls the event loop for other connections. Streamed batches are
+# scored STREAM_CHUNK_SIZE texts per executor call and every frame is
+# drained before the next, so a slow reader applies backpressure.
+STREAM_CHUNK_SIZE = 64
+MAX_DISCARD_SIZE = 64 << 20  # oversized frames up to this are skipped, not fatal
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+async def handle_message(message: Any, send: Send) -> None:
+    """Score one decoded request and send its response frame(s)."""
+    if not isinstance(message, dict):
+        await send({"id": None, "result": error_response("INVALID_REQUEST", "Request must be a map")})
+        return
+
+    request_id = message.get("id")
+    op = message.get("op", "analyze")
+    profile = message.get("profile", DEFAULT_PROFILE)
+    scoring_mode = message.get("scoring_mode")
+
+    if profile is not None and not isinstance(profile, str):
+        await send({
+            "id": request_id,
+            "done": True,
+            "result": error_response("INVALID_TYPE", "profile must be a string")
+        })
+    elif op == "analyze":
+        result = await asyncio.to_thread(
+            analyze_text, message.get("text"), profile, scoring_mode, message.get("deadline_ms")
+        )
+        await send({"id": request_id, "result": result})
+    elif op == "batch":
+        texts = message.get("texts")
+        if not isinstance(texts, list):
+            await send({
+                "id": request_id,
+                "done": True,
+                "result": error_response("INVALID_TYPE", "texts must be a list of strings")
+            })
+        elif message.get("stream"):
+            for start in range(0, len(texts), STREAM_CHUNK_SIZE):
+                chunk = texts[start:start + STREAM_CHUNK_SIZE]
+                results = await asyncio.to_thread(analyze_batch, chunk, profile, scoring_mode)
+                for offset, result in enumerate(results):
+                    await send({"id": request_id, "index": start + offset, "result": result})
+            await send({"id": request_id, "done": True})
+        else:
+            results = await asyncio.to_thread(analyze_batch, texts, profile, scoring_mode)
+            await send({"id": request_id, "results": results})
+    else:
+        await send({"id": request_id, "result": error_response("UNKNOWN_OP", f"Unknown op: {op}")})
+
+
+async def discard(reader: asyncio.StreamReader, length: int) -> None:
+    while length > 0:
+        chunk = await reader.read(min(length, 1 << 16))
+        if not chunk:
+            raise asyncio.IncompleteReadError(b"", length)
+        length -= len(chunk)
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    async def send_frame(response: Dict[str, Any], codec: int) -> None:
+        writer.write(pack_frame(response, codec))
+        await writer.drain()
+
+    try:
+        while True:
+            try:
+                header = await reader.readexactly(FRAME_HEADER.size)
+            except asyncio.IncompleteReadError:
+                break
+
+            length, codec = FRAME_HEADER.unpack(header)
+            if length > MAX_FRAME_SIZE:
+                logger.warning("Transport frame too large | length=%d | max=%d", length, MAX_FRAME_SIZE)
+                too_large = error_response(
+                    "FRAME_TOO_LARGE",
+                    f"Frame of {length} bytes exceeds maximum of {MAX_FRAME_SIZE} bytes"
+                )
+                if length > MAX_DISCARD_SIZE:
+                    await send_frame({"id": None, "result": too_large}, CODEC_JSON)
+                    break
+                # Skip the payload so the connection stays in sync
+                await discard(reader, length)
+                await send_frame({"id": None, "result": too_large}, CODEC_JSON)
+                continue
+            payload = await reader.readexactly(length)
+
+            try:
+                message = decode_payload(payload, codec)
+            except Exception as exc:
+                logger.warning("Transport frame rejected | reason=%s", exc)
+                await send_frame(
+                    {"id": None, "result": error_response("INVALID_FRAME", str(exc))},
+                    CODEC_JSON
+                )
+                continue
+
+            try:
+                await handle_message(message, lambda response: send_frame(response, codec))
+            except (ConnectionError, asyncio.CancelledError):
+                raise
+            except Exception:
+                logger.error("Unexpected transport error while handling request", exc_info=True)
+                request_id = message.get("id") if isinstance(message, dict) else None
+                # "done" also ends a streamed batch that failed partway
+                await send_frame(
+                    {
+                        "id": request_id,
+                        "done": True,
+                        "result": error_response("INTERNAL_ERROR", "Unexpected processing error")
+                    },
+                    codec
+                )
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_tcp_server(host: str = "127.0.0.1", port: int = 9000) -> asyncio.AbstractServer:
+    return await asyncio.start_server(handle_connection, host, port)
+
+
+async def start_unix_server(path: str) -> asyncio.AbstractServer:
+    return await asyncio.start_unix_server(handle_connection, path)
+
+
+# =========================
+# Client
+# =========================
+class TransportClient:
+    """Blocking client for the binary transport."""
+
+    def __init__(self, sock: socket.socket, codec: int = DEFAULT_CODEC):
+        self._sock = sock
+        self._rfile = sock.makefile("rb")
+        self._codec = codec
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def connect_tcp(cls, host: str, port: int, codec: int = DEFAULT_CODEC) -> "TransportClient":
+        sock = socket.create_connection((host, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(sock, codec)
+
+    @classmethod
+    def connect_unix(cls, path: str, codec: int = DEFAULT_CODEC) -> "TransportClient":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        return cls(sock, codec)
+
+    def close(self) -> None:
+        self._rfile.close()
+        self._sock.close()
+
+    def __enter__(self) -> "TransportClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _send(self, message: Dict[str, Any]) -> int:
+        message["id"] = next(self._ids)
+        self._sock.sendall(pack_frame(message, self._codec))
+        return message["id"]
+
+    def _recv(self) -> Dict[str, Any]:
+        header = self._rfile.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise TransportError("Connection closed by server")
+        length, codec = FRAME_HEADER.unpack(header)
+        payload = self._rfile.read(length)
+        if len(payload) < length:
+            raise TransportError("Connection closed mid-frame")
+        return decode_payload(payload, codec)
+
+    def _recv_for(self, request_id: int) -> Dict[str, Any]:
+        response = self._recv()
+        if response.get("id") is None and "result" in response:
+            # Connection-level error (oversized or undecodable frame)
+            errors = response["result"].get("errors") or {}
+            raise TransportError(f"{errors.get('error_code')}: {errors.get('message')}")
+        if response.get("id") != request_id:
+            raise TransportError(f"Out-of-order response: expected {request_id}, got {response.get('id')}")
+        return response
+
+    def analyze(
+        self,
+        text: str,
+        profile: str = DEFAULT_PROFILE,
+        scoring_mode: Optional[str] = None,
+        deadline_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        request_id = self._send({
+            "op": "analyze", "text": text, "profile": profile,
+            "scoring_mode": scoring_mode, "deadline_ms": deadline_ms
+        })
+        return self._recv_for(request_id)["result"]
+
+    def analyze_batch(
+        self,
+        texts: List[str],
+        profile: str = DEFAULT_PROFILE,
+        scoring_mode: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        request_id = self._send({
+            "op": "batch", "texts": list(texts), "profile": profile, "scoring_mode": scoring_mode
+        })
+        response = self._recv_for(request_id)
+        if "results" not in response:
+            raise TransportError(response["result"]["errors"]["message"])
+        return response["results"]
+
+    def stream_batch(
+        self,
+        texts: List[str],
+        profile: str = DEFAULT_PROFILE,
+        scoring_mode: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Send one batch and yield results as the server streams them back."""
+        request_id = self._send({
+            "op": "batch", "texts": list(texts), "profile": profile,
+            "scoring_mode": scoring_mode, "stream": True
+        })
+        while True:
+            response = self._recv_for(request_id)
+            if "index" not in response:
+                if "result" in response:
+                    errors = response["result"].get("errors") or {}
+                    raise TransportError(f"{errors.get('error_code')}: {errors.get('message')}")
+                return
+            yield response["result"]
+
+    def analyze_many(
+        self,
+        texts: Iterable[str],
+        profile: str = DEFAULT_PROFILE,
+        scoring_mode: Optional[str] = None,
+        window: int = 64
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Pipeline single-text requests, keeping up to ``window`` in flight,
+        and yield results in input order.
+        """
+        pending: List[int] = []
+        for text in texts:
+            pending.append(self._send({
+                "op": "analyze", "text": text, "profile": profile, "scoring_mode": scoring_mode
+            }))
+            if len(pending) >= window:
+                yield self._recv_for(pending.pop(0))["result"]
+        for request_id in pending:
+            yield self._recv_for(request_id)["result"]
+
+
+# =========================
+# Server Entry Point
+# =========================
+# python -m app.transport --tcp 127.0.0.1:9000
+# python -m app.transport --unix /run/text-risk.sock
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.transport")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--tcp", metavar="HOST:PORT")
+    group.add_argument("--unix", metavar="PATH")
+    parser.add_argument("--cache", metavar="PATH", default=None, help="SQLite result cache file")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        from app.cache import ResultCache
+        set_result_cache(ResultCache(args.cache))
+
+    async def serve() -> None:
+        if args.tcp:
+            host, _, port = args.tcp.rpartition(":")
+            server = await start_tcp_server(host or "127.0.0.1", int(port))
+        else:
+            server = await start_unix_server(args.unix)
+        logger.info("Binary transport listening | address=%s", args.tcp or args.unix)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
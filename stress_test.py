@@ -1,23 +1,49 @@
 from app.engine import analyze_text
+import argparse
 import time
 
 TEST_TEXT = "kill and scam"
 
-results = []
-times = []
 
-for i in range(100):
-    start = time.time()
-    result = analyze_text(TEST_TEXT)
-    end = time.time()
+def main():
+    parser = argparse.ArgumentParser(description="Repeated-call determinism and latency check.")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument(
+        "--profile", metavar="PREFIX", default=None,
+        help="Write cProfile stats to PREFIX.pstats and per-stage timings to PREFIX.json"
+    )
+    args = parser.parse_args()
 
-    results.append(result)
-    times.append(end - start)
+    results = []
+    times = []
 
-# Verify determinism
-all_same = all(r == results[0] for r in results)
+    def run():
+        for i in range(args.iterations):
+            start = time.time()
+            result = analyze_text(TEST_TEXT)
+            end = time.time()
 
-print("Deterministic:", all_same)
-print("Example result:", results[0])
-print("Max time:", max(times))
-print("Min time:", min(times))
+            results.append(result)
+            times.append(end - start)
+
+    if args.profile:
+        from app.profiling import print_breakdown, profiled
+        with profiled(args.profile) as timer:
+            run()
+    else:
+        run()
+
+    # Verify determinism
+    all_same = all(r == results[0] for r in results)
+
+    print("Deterministic:", all_same)
+    print("Example result:", results[0])
+    print("Max time:", max(times))
+    print("Min time:", min(times))
+
+    if args.profile:
+        print_breakdown(timer, args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+from app import engine
+from app.cache import ResultCache
+from app.engine import (
+    RISK_KEYWORDS,
+    ScoringProfile,
+    analyze_batch,
+    analyze_text,
+    result_cache_key,
+    set_result_cache,
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    set_result_cache(cache)
+    yield cache
+    set_result_cache(None)
+    cache.close()
+
+
+# =========================
+# Cache Key Tests
+# =========================
+
+def test_key_uses_normalized_text():
+    assert result_cache_key("  SCAM ") == result_cache_key("scam")
+
+
+def test_key_changes_with_scoring_config():
+    heavy = ScoringProfile(name="heavy", lexicon=RISK_KEYWORDS, keyword_weight=0.3)
+    assert result_cache_key("scam")[0] == result_cache_key("scam", heavy)[0]
+    assert result_cache_key("scam")[1] != result_cache_key("scam", heavy)[1]
+    assert result_cache_key("scam")[1] != result_cache_key("scam", scoring_mode="density")[1]
+
+
+def test_key_changes_with_lexicon():
+    smaller = ScoringProfile(name="smaller", lexicon={"fraud": ["scam"]})
+    assert result_cache_key("scam")[0] != result_cache_key("scam", smaller)[0]
+
+
+# =========================
+# Storage Tests
+# =========================
+
+def test_bulk_get_and_put(tmp_path):
+    store = ResultCache(str(tmp_path / "bulk.db"))
+    items = [(("v", "c", str(i)), {"n": i}) for i in range(1000)]
+    store.put_many(items)
+    found = store.get_many(key for key, _ in items)
+    assert len(found) == 1000
+    assert found[("v", "c", "7")] == {"n": 7}
+    assert store.get(("v", "c", "missing")) is None
+
+
+def test_size_bounded_eviction(tmp_path):
+    store = ResultCache(str(tmp_path / "small.db"), max_entries=10)
+    store.put_many((("v", "c", str(i)), {"n": i}) for i in range(25))
+    assert len(store) == 10
+    assert store.get(("v", "c", "24")) == {"n": 24}
+    assert store.get(("v", "c", "0")) is None
+
+
+def test_eviction_keeps_max_entries_after_replacing_puts(tmp_path):
+    store = ResultCache(str(tmp_path / "small.db"), max_entries=10)
+    store.put_many((("v", "c", str(i)), {"n": i}) for i in range(10))
+    for _ in range(9):
+        store.put(("v", "c", "0"), {"n": 0})
+    assert len(store) == 10
+    store.put(("v", "c", "new"), {"n": -1})
+    assert len(store) == 10
+    assert store.get(("v", "c", "1")) is None
+    assert store.get(("v", "c", "0")) == {"n": 0}
+
+
+def test_eviction_is_amortized(tmp_path):
+    store = ResultCache(str(tmp_path / "slack.db"), max_entries=100)
+    store.put_many((("v", "c", str(i)), {"n": i}) for i in range(100))
+    for i in range(9):
+        store.put(("v", "c", f"extra{i}"), {"n": i})
+    assert len(store) == 109  # within the slack, no trim yet
+    store.put(("v", "c", "extra9"), {"n": 9})
+    assert len(store) == 100
+    assert store.get(("v", "c", "extra9")) == {"n": 9}
+    assert store.get(("v", "c", "9")) is None
+
+
+def mean_put_seconds(store, prefix, count=300):
+    started = time.perf_counter()
+    for i in range(count):
+        store.put(("v", "c", f"{prefix}{i}"), {"n": i})
+    return (time.perf_counter() - started) / count
+
+
+def test_put_on_full_cache_costs_about_the_same_as_on_empty(tmp_path):
+    max_entries = 50_000
+    empty = ResultCache(str(tmp_path / "empty.db"), max_entries=max_entries)
+    full = ResultCache(str(tmp_path / "full.db"), max_entries=max_entries)
+    full.put_many((("v", "c", str(i)), {"n": i}) for i in range(max_entries))
+
+    empty_cost = mean_put_seconds(empty, "new")
+    full_cost = mean_put_seconds(full, "new")
+    assert full_cost < 3 * empty_cost + 0.0002
+
+
+# =========================
+# Read-Through Tests
+# =========================
+
+def test_read_through_shared_across_connections(cache, monkeypatch):
+    expected = analyze_text("kill and scam")
+    assert len(cache) == 1
+
+    # A second connection to the same file, as another worker would open
+    set_result_cache(ResultCache(cache.path))
+    monkeypatch.setattr(engine, "compute_analysis", lambda *args: pytest.fail("cache miss"))
+    assert analyze_text("  KILL and scam ") == expected
+
+
+def test_batch_uses_cache(cache):
+    analyze_text("scam")
+    results = analyze_batch(["scam", "kill", "kill", ""])
+    assert results[0] == analyze_text("scam")
+    assert results[1] == results[2]
+    assert results[3]["errors"]["error_code"] == "EMPTY_INPUT"
+    assert len(cache) == 2
+
+
+def test_deadline_and_error_results_are_not_cached(cache):
+    analyze_text("scam", deadline_ms=10_000)
+    analyze_text("")
+    assert len(cache) == 0
+
+
+def test_unhashable_profile_skips_cache(cache):
+    assert result_cache_key("scam", ["x"]) is None
+    result = analyze_text("scam", ["x"])
+    assert result["errors"] is not None
+    assert analyze_batch(["scam"], ["x"]) == [result]
+    assert len(cache) == 0
+
+
+def test_batch_duplicates_are_separate_objects(cache):
+    analyze_text("scam")
+    results = analyze_batch(["scam", "scam", "kill", "kill"])
+    assert results[0] == results[1] and results[0] is not results[1]
+    assert results[2] == results[3] and results[2] is not results[3]
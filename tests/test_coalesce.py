@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from app.coalesce import SingleFlight, request_key
+from app.engine import analyze_text
+
+
+# =========================
+# Request Key Tests
+# =========================
+
+def test_request_key_uses_normalized_text():
+    assert request_key("  Scam ", "default") == request_key("scam", "default")
+
+
+def test_request_key_includes_config():
+    assert request_key("scam", "default", None) != request_key("scam", "default", "density")
+
+
+# =========================
+# Single-Flight Tests
+# =========================
+
+def test_concurrent_identical_calls_are_coalesced():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_analysis():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return analyze_text("kill and scam")
+
+    def worker():
+        results.append(flight.do("same-key", slow_analysis))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    started.wait()
+
+    followers = [threading.Thread(target=worker) for _ in range(4)]
+    for t in followers:
+        t.start()
+    while flight.stats()["coalesced_requests"] < 4:
+        time.sleep(0.001)
+    release.set()
+
+    for t in [leader] + followers:
+        t.join()
+
+    assert len(calls) == 1
+    assert flight.stats() == {"coalesced_requests": 4, "in_flight": 0}
+    assert sum(shared for _, shared in results) == 4
+    assert all(result == results[0][0] for result, _ in results)
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    flight.do("key", lambda: analyze_text("scam"))
+    _, shared = flight.do("key", lambda: analyze_text("scam"))
+    assert shared is False
+    assert flight.coalesced == 0
+
+
+def test_errors_propagate_and_clear_in_flight_entry():
+    flight = SingleFlight()
+
+    def broken():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        flight.do("key", broken)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing_analysis():
+        started.set()
+        release.wait()
+        raise ValueError("boom")
+
+    def worker():
+        try:
+            flight.do("key", failing_analysis)
+        except ValueError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=worker)
+    follower.start()
+    while flight.stats()["coalesced_requests"] < 1:
+        time.sleep(0.001)
+    release.set()
+    for t in (leader, follower):
+        t.join()
+
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+    assert flight.stats() == {"coalesced_requests": 1, "in_flight": 0}
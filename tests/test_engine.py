@@ -1,4 +1,8 @@
-from app.engine import analyze_text
+import pytest
+
+from app import engine, matcher
+from app.engine import RISK_KEYWORDS, ScoringProfile, analyze_text
+from app.matcher import MATCHER_CACHE_SIZE, get_matcher, lexicon_version
 
 
 # =========================
@@ -88,6 +92,124 @@ def test_low_confidence_ambiguous():
     assert result["confidence_score"] < 0.7
 
 
+# =========================
+# Scoring Profile Tests
+# =========================
+
+def test_default_profile_matches_implicit_default():
+    assert analyze_text("kill and scam", "default") == analyze_text("kill and scam")
+
+
+def test_unknown_profile():
+    result = analyze_text("kill", "does-not-exist")
+    assert result["errors"]["error_code"] == "UNKNOWN_PROFILE"
+
+
+def test_profile_thresholds_and_weights(monkeypatch):
+    strict = ScoringProfile(
+        name="strict",
+        lexicon=RISK_KEYWORDS,
+        keyword_weight=0.4,
+        medium_threshold=0.2,
+        high_threshold=0.4,
+    )
+    monkeypatch.setitem(engine.SCORING_PROFILES, "strict", strict)
+    result = analyze_text("scam", "strict")
+    assert result["risk_score"] == 0.4
+    assert result["risk_category"] == "HIGH"
+
+
+def test_profile_category_subset():
+    fraud_only = ScoringProfile(
+        name="fraud_only", lexicon=RISK_KEYWORDS, categories=("fraud",)
+    )
+    result = analyze_text("kill and scam", fraud_only)
+    assert result["trigger_reasons"] == ["Detected fraud keyword: scam"]
+
+
+def test_profiles_share_compiled_matcher():
+    other = ScoringProfile(name="other", lexicon=RISK_KEYWORDS, keyword_weight=0.1)
+    assert get_matcher(other.lexicon) is get_matcher(RISK_KEYWORDS)
+    assert get_matcher(dict(RISK_KEYWORDS)) is get_matcher(RISK_KEYWORDS)
+
+
+def test_matcher_cache_is_bounded():
+    for i in range(MATCHER_CACHE_SIZE * 2):
+        get_matcher({"adhoc": [f"word{i}"]})
+    assert len(matcher._BY_CONTENT) <= MATCHER_CACHE_SIZE
+    assert len(matcher._BY_IDENTITY) <= MATCHER_CACHE_SIZE
+    assert lexicon_version({"adhoc": ["word0"]}) == lexicon_version({"adhoc": ["word0"]})
+
+
+# =========================
+# Density Scoring Tests
+# =========================
+
+def test_matcher_counts_and_positions():
+    found = get_matcher(RISK_KEYWORDS).find("kill, kill myself. kill")
+    assert found["kill"] == [0, 6, 19]
+    assert found["kill myself"] == [6]
+
+
+def test_density_mode_rewards_repetition():
+    once = analyze_text("scam", scoring_mode="density")
+    repeated = analyze_text("scam scam scam scam", scoring_mode="density")
+    assert once["risk_score"] == 0.2
+    assert repeated["risk_score"] == 0.6
+    assert repeated["trigger_reasons"] == ["Detected fraud keyword: scam (x4)"]
+
+
+def test_density_mode_respects_category_cap():
+    result = analyze_text("scam " * 500, scoring_mode="density")
+    assert result["risk_score"] == 0.6
+
+
+def test_density_mode_discounts_sparse_hits():
+    result = analyze_text("scam " + "hello " * 800, scoring_mode="density")
+    assert result["risk_score"] < 0.2
+
+
+def test_invalid_scoring_mode():
+    result = analyze_text("scam", scoring_mode="bogus")
+    assert result["errors"]["error_code"] == "INVALID_SCORING_MODE"
+
+
+# =========================
+# Deadline Tests
+# =========================
+
+def test_deadline_not_exceeded_reports_elapsed():
+    result = analyze_text("kill and scam", deadline_ms=10_000)
+    assert result["partial"] is False
+    assert result["errors"] is None
+    assert result["elapsed_ms"] >= 0
+    assert result["risk_score"] == analyze_text("kill and scam")["risk_score"]
+
+
+def test_deadline_exceeded_returns_partial_result():
+    result = analyze_text("scam " * 1000, deadline_ms=1e-6)
+    assert result["partial"] is True
+    assert result["errors"]["error_code"] == "DEADLINE_EXCEEDED"
+    assert result["processed_length"] < 5000
+
+
+def test_matcher_scan_stops_at_deadline():
+    text = "scam " * 1000
+    found, scanned = get_matcher(RISK_KEYWORDS).scan(text, deadline_ns=0)
+    assert scanned < len(text)
+    assert len(found["scam"]) == 256
+
+
+@pytest.mark.parametrize("deadline_ms", [-5, 0, float("inf"), float("nan"), True])
+def test_invalid_deadline(deadline_ms):
+    result = analyze_text("scam", deadline_ms=deadline_ms)
+    assert result["errors"]["error_code"] == "INVALID_DEADLINE"
+
+
+def test_no_deadline_keeps_original_fields():
+    assert "partial" not in analyze_text("scam")
+
+
 # from app.engine import analyze_text
 
 # def test_determinism():
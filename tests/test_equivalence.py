@@ -0,0 +1,42 @@
+from app import equivalence
+from app.engine import MAX_TEXT_LENGTH
+from app.equivalence import MODES, boundary_cases, check_equivalence, generate_corpus
+
+
+# =========================
+# Corpus Tests
+# =========================
+
+def test_corpus_is_deterministic_and_starts_with_boundary_cases():
+    corpus = generate_corpus(200, seed=7)
+    assert corpus == generate_corpus(200, seed=7)
+    assert corpus[:len(boundary_cases())] == boundary_cases()
+    assert len(corpus) == 200
+
+
+def test_corpus_covers_truncation_boundary():
+    lengths = {len(text) for text in boundary_cases() if isinstance(text, str)}
+    assert {MAX_TEXT_LENGTH - 1, MAX_TEXT_LENGTH, MAX_TEXT_LENGTH + 1} & lengths
+
+
+# =========================
+# Equivalence Tests
+# =========================
+
+def test_all_engine_modes_match_reference():
+    report = check_equivalence(generate_corpus(400, seed=1), MODES)
+    for mode, entry in report["modes"].items():
+        assert entry["differences"] == [], mode
+
+
+def test_differences_are_reported(monkeypatch):
+    def broken(corpus):
+        results = equivalence.run_single(corpus)
+        results[8] = dict(results[8], risk_category="HIGH")
+        return results
+
+    monkeypatch.setitem(equivalence.MODE_RUNNERS, "single", broken)
+    report = check_equivalence(boundary_cases(), ("single",))
+    (difference,) = report["modes"]["single"]["differences"]
+    assert difference["index"] == 8
+    assert difference["fields"] == ["risk_category"]
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import sys
+
+import pytest
+
+from app import loadtest
+from app.loadtest import (
+    compare_runs,
+    find_saturation,
+    load_corpus,
+    parse_target,
+    percentile,
+    run_step,
+    start_local_server,
+)
+
+
+async def fake_service(reader, writer, delay=0.0):
+    """Keep-alive HTTP/1.1 stub: 200 for /analyze, 404 elsewhere."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            await asyncio.sleep(delay)
+            status = b"200 OK" if request_line.split()[1] == b"/analyze" else b"404 Not Found"
+            body = b'{"risk_score": 0.0}'
+            writer.write(
+                b"HTTP/1.1 " + status + b"\r\nContent-Length: "
+                + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def run_against_fake_service(delay=0.0, **kwargs):
+    async def scenario():
+        server = await asyncio.start_server(
+            lambda reader, writer: fake_service(reader, writer, delay), "127.0.0.1", 0
+        )
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await run_step("127.0.0.1", port, ["kill", "scam"], **kwargs)
+    return asyncio.run(scenario())
+
+
+# =========================
+# Load Step Tests
+# =========================
+
+def test_closed_loop_step_reports_latency_and_throughput():
+    step = run_against_fake_service(concurrency=4, duration_s=0.2)
+    assert step["requests"] > 0
+    assert step["errors"] == 0
+    assert step["throughput_rps"] > 0
+    assert 0 < step["latency_ms"]["p50"] <= step["latency_ms"]["p99"] <= step["latency_ms"]["max"]
+
+
+def test_open_loop_rate_is_respected():
+    step = run_against_fake_service(concurrency=2, duration_s=0.5, rate=40)
+    assert 19 <= step["requests"] <= 21
+    assert step["requested_rate_rps"] == 40
+
+
+def test_open_loop_does_not_wait_for_slow_responses():
+    step = run_against_fake_service(delay=0.2, concurrency=1, duration_s=0.5, rate=40)
+    assert step["requests"] == 20
+    assert step["errors"] == 0
+    assert step["connections"] > 1
+    assert step["latency_ms"]["p50"] >= 200
+
+
+def test_non_200_responses_count_as_errors():
+    step = run_against_fake_service(concurrency=1, duration_s=0.1, path="/missing")
+    assert step["error_rate"] == 1.0
+
+
+# =========================
+# Reporting Tests
+# =========================
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def make_step(workers, concurrency, rps, error_rate=0.0):
+    return {
+        "workers": workers, "concurrency": concurrency, "throughput_rps": rps,
+        "error_rate": error_rate, "latency_ms": {"p99": concurrency / 10},
+    }
+
+
+def test_saturation_is_last_level_with_meaningful_gain():
+    steps = [make_step(1, 1, 100), make_step(1, 4, 350), make_step(1, 16, 370), make_step(1, 64, 380)]
+    assert find_saturation(steps)["1"]["concurrency"] == 4
+
+
+def test_compare_runs_reports_deltas():
+    previous = {"steps": [make_step(1, 4, 100)]}
+    current = {"steps": [make_step(1, 4, 120), make_step(1, 8, 130)]}
+    lines = compare_runs(previous, current)
+    assert "+20.0%" in lines[1]
+    assert "n/a" in lines[2]
+
+
+def test_load_corpus_accepts_jsonl_and_plain_lines(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(
+        json.dumps({"text": "kill"}) + "\n"
+        + json.dumps({"request_id": "x", "title": "t", "body": "scam body"}) + "\n"
+        + "plain line\n\n"
+    )
+    assert load_corpus(str(corpus)) == ["kill", "scam body", "plain line"]
+
+
+# =========================
+# Target Tests
+# =========================
+
+def test_parse_target_honors_scheme_port_and_path():
+    assert parse_target("http://10.0.0.5:8000") == ("10.0.0.5", 8000, False, "/analyze")
+    assert parse_target("https://risk.internal/api/") == ("risk.internal", 443, True, "/api/analyze")
+
+
+@pytest.mark.parametrize("url", ["ftp://host/", "localhost:8000", "http://"])
+def test_unsupported_urls_are_rejected(url):
+    with pytest.raises(ValueError):
+        parse_target(url)
+    with pytest.raises(SystemExit):
+        loadtest.main(["--url", url])
+
+
+def test_failed_local_start_reports_server_stderr(monkeypatch):
+    monkeypatch.setattr(
+        loadtest, "server_command",
+        lambda workers, port: [sys.executable, "-c", "import sys; sys.exit('bad app config')"]
+    )
+    with pytest.raises(RuntimeError, match="(?s)exited with code 1.*bad app config"):
+        start_local_server(1, loadtest.free_port())
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")  # required by TestClient
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.coalesce import SingleFlight
+from app.engine import analyze_text
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "analyze_flight", SingleFlight())
+    return TestClient(main.app)
+
+
+# =========================
+# HTTP Endpoint Tests
+# =========================
+
+def test_analyze_returns_engine_result(client):
+    response = client.post("/analyze", json={"text": "kill and scam"})
+    assert response.status_code == 200
+    assert response.json() == analyze_text("kill and scam")
+    assert "partial" not in response.json()
+
+
+def test_deadline_fields_only_with_deadline(client):
+    body = client.post("/analyze", json={"text": "scam", "deadline_ms": 1000}).json()
+    assert body["partial"] is False
+    assert body["elapsed_ms"] >= 0
+
+
+def test_identical_concurrent_requests_are_coalesced(client, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_analyze_text(*args):
+        calls.append(args)
+        started.set()
+        release.wait()
+        return analyze_text(*args)
+
+    monkeypatch.setattr(main, "analyze_text", slow_analyze_text)
+    responses = []
+
+    def post():
+        responses.append(client.post("/analyze", json={"text": "kill and scam"}))
+
+    leader = threading.Thread(target=post)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=post) for _ in range(3)]
+    for t in followers:
+        t.start()
+    while main.analyze_flight.stats()["coalesced_requests"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r.json() == analyze_text("kill and scam") for r in responses)
+    assert client.get("/stats").json() == {"coalesced_requests": 3, "in_flight": 0}
@@ -0,0 +1,93 @@
+import json
+import threading
+
+from app.engine import StageHook, add_stage_hook, analyze_text, remove_stage_hook
+from app.profiling import StageTimer, profiled
+
+
+class RecordingHook(StageHook):
+    def __init__(self):
+        self.calls = []
+
+    def before_stage(self, stage):
+        self.calls.append(("before", stage))
+
+    def after_stage(self, stage, elapsed_ns):
+        self.calls.append(("after", stage))
+
+
+# =========================
+# Stage Hook Tests
+# =========================
+
+def test_hooks_see_every_stage_in_order():
+    hook = RecordingHook()
+    add_stage_hook(hook)
+    try:
+        analyze_text("kill and scam")
+    finally:
+        remove_stage_hook(hook)
+
+    stages = [stage for event, stage in hook.calls if event == "before"]
+    assert stages == ["normalize", "match", "score", "classify", "confidence", "log", "build"]
+    assert hook.calls[0] == ("before", "normalize")
+    assert hook.calls[1] == ("after", "normalize")
+
+
+def test_hooks_do_not_change_results():
+    expected = analyze_text("kill and scam")
+    timer = StageTimer()
+    add_stage_hook(timer)
+    try:
+        assert analyze_text("kill and scam") == expected
+    finally:
+        remove_stage_hook(timer)
+
+
+# =========================
+# Profiling Output Tests
+# =========================
+
+def test_profiled_writes_pstats_and_stage_json(tmp_path):
+    prefix = str(tmp_path / "run")
+    with profiled(prefix):
+        for _ in range(3):
+            analyze_text("kill and scam")
+
+    with open(prefix + ".json") as f:
+        data = json.load(f)
+    assert data["stages"]["match"]["calls"] == 3
+    assert data["stages"]["match"]["total_ns"] > 0
+    assert len(data["traceEvents"]) == 3 * 7
+    assert (tmp_path / "run.pstats").stat().st_size > 0
+
+
+def test_concurrent_stages_keep_their_own_timings():
+    timer = StageTimer()
+    # keep every worker alive until all finish, so thread ids are not reused
+    finished = threading.Barrier(4)
+
+    def worker():
+        for _ in range(20):
+            analyze_text("kill and scam " * 50)
+        finished.wait()
+
+    add_stage_hook(timer)
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        remove_stage_hook(timer)
+
+    events = timer.events
+    assert len(events) == 4 * 20 * 7
+    assert len({event["tid"] for event in events}) == 4
+    for tid in {event["tid"] for event in events}:
+        spans = sorted(
+            (event["ts"], event["ts"] + event["dur"]) for event in events if event["tid"] == tid
+        )
+        # stages of one thread run one after another and never overlap
+        assert all(end <= next_start + 0.001 for (_, end), (next_start, _) in zip(spans, spans[1:]))
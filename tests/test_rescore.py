@@ -0,0 +1,138 @@
+import copy
+import dataclasses
+import random
+import time
+
+from app.engine import RISK_KEYWORDS, analyze_text, compute_analysis, get_profile
+from app.rescore import (
+    DiffMatcher,
+    changed_keywords,
+    diff_lexicons,
+    rescore_changed,
+    rescore_record,
+    stored_counts,
+)
+
+
+def stored(texts):
+    return [{"id": i, "text": text, "result": analyze_text(text)} for i, text in enumerate(texts)]
+
+
+def with_keyword(category, keyword):
+    lexicon = copy.deepcopy(RISK_KEYWORDS)
+    lexicon[category].append(keyword)
+    return lexicon
+
+
+# =========================
+# Lexicon Diff Tests
+# =========================
+
+def test_diff_only_scans_keywords_new_to_the_lexicon():
+    new = with_keyword("fraud", "wire transfer")
+    new["weapons"].append("kill")  # already scored under violence
+    diff = diff_lexicons(RISK_KEYWORDS, new, get_profile("default"))
+    assert diff["added"] == {("fraud", "wire transfer"), ("weapons", "kill")}
+    assert diff["removed"] == set()
+    assert diff["scan"] == {"wire transfer"}
+
+
+def test_stored_counts_parse_reasons():
+    result = analyze_text("scam scam kill", scoring_mode="density")
+    assert stored_counts(result) == {"kill": 1, "scam": 2}
+
+
+# =========================
+# Rescoring Tests
+# =========================
+
+def test_only_changed_decisions_are_returned():
+    records = stored(["urgent wire transfer and scam", "hello there", "wire transfer"])
+    new = with_keyword("fraud", "wire transfer")
+
+    changed = list(rescore_changed(records, RISK_KEYWORDS, new))
+
+    assert [record["id"] for record in changed] == [0]
+    assert changed[0]["previous_result"]["risk_category"] == "LOW"
+    assert changed[0]["result"]["risk_category"] == "MEDIUM"
+
+
+def test_rescored_result_matches_full_analysis():
+    new = with_keyword("fraud", "wire transfer")
+    new["violence"].remove("kill")
+    records = stored(["kill the wire transfer scam", "kill kill", "  WIRE transfer, scam!"])
+    full = dataclasses.replace(get_profile("default"), lexicon=new)
+
+    changed = rescore_changed(
+        records, RISK_KEYWORDS, new,
+        compare=("risk_score", "risk_category", "confidence_score", "trigger_reasons")
+    )
+    for record in changed:
+        assert record["result"] == compute_analysis(record["text"], full)
+
+
+def test_unchanged_lexicon_yields_nothing():
+    assert list(rescore_changed(stored(["kill"]), RISK_KEYWORDS, RISK_KEYWORDS)) == []
+
+
+def test_diff_matcher_prefilter_matches_whole_words_only():
+    matcher = DiffMatcher({"wire transfer", "scam"})
+    assert matcher.find("nothing to see") == {}
+    assert matcher.find("scammers wire transferred") == {}
+    assert matcher.find("a wire transfer scam") == {"scam": [16], "wire transfer": [2]}
+
+
+def realistic_records(count, seed=0):
+    rng = random.Random(seed)
+    words = ["the", "message", "today", "friends", "skill", "hello", "report", "wire", "my"]
+    keywords = [keyword for keywords in RISK_KEYWORDS.values() for keyword in keywords]
+    texts = [
+        " ".join(
+            rng.choice(keywords) if rng.random() < 0.02 else rng.choice(words)
+            for _ in range(rng.randint(20, 200))
+        )
+        for _ in range(count)
+    ]
+    return stored(texts + ["urgent wire transfer", "wire transfer scam"])
+
+
+def test_every_record_matches_full_analysis():
+    new = with_keyword("fraud", "wire transfer")
+    new["violence"].remove("kill")
+    profile = get_profile("default")
+    full = dataclasses.replace(profile, lexicon=new)
+    diff = diff_lexicons(RISK_KEYWORDS, new, profile)
+    changed = changed_keywords(RISK_KEYWORDS, new, profile, diff)
+    assert changed == {"wire transfer", "kill"}
+
+    for record in realistic_records(300):
+        rescored = rescore_record(
+            record["text"], record["result"], DiffMatcher(diff["scan"]), full,
+            "presence", changed
+        )
+        assert rescored == compute_analysis(record["text"], full)
+
+
+def test_reordered_or_duplicated_lexicon_disables_skipping():
+    profile = get_profile("default")
+    duplicated = with_keyword("drugs", "cocaine")
+    reordered = dict(reversed(list(RISK_KEYWORDS.items())))
+    for new in (duplicated, reordered):
+        diff = diff_lexicons(RISK_KEYWORDS, new, profile)
+        assert changed_keywords(RISK_KEYWORDS, new, profile, diff) is None
+
+
+def test_diff_rescore_is_cheaper_than_full_analysis():
+    records = realistic_records(2000)
+    new = with_keyword("fraud", "wire transfer")
+    full = dataclasses.replace(get_profile("default"), lexicon=new)
+
+    started = time.perf_counter()
+    list(rescore_changed(records, RISK_KEYWORDS, new))
+    rescore_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for record in records:
+        compute_analysis(record["text"], full)
+    full_s = time.perf_counter() - started
+
+    assert rescore_s * 3 < full_s
@@ -0,0 +1,175 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from app import transport
+from app.engine import analyze_batch, analyze_text
+from app.transport import (
+    CODEC_JSON,
+    CODEC_MSGPACK,
+    FRAME_HEADER,
+    TransportClient,
+    TransportError,
+    msgpack,
+    start_tcp_server,
+    start_unix_server,
+)
+
+CODECS = [CODEC_JSON] + ([CODEC_MSGPACK] if msgpack is not None else [])
+
+
+async def cancel_pending_tasks():
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0.01)  # let transports run their close callbacks
+
+
+async def close_server(server):
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    asyncio.run_coroutine_threadsafe(cancel_pending_tasks(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def tcp_port(loop):
+    server = asyncio.run_coroutine_threadsafe(start_tcp_server("127.0.0.1", 0), loop).result()
+    yield server.sockets[0].getsockname()[1]
+    asyncio.run_coroutine_threadsafe(close_server(server), loop).result()
+
+
+# =========================
+# Loopback Tests
+# =========================
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_analyze_matches_engine(tcp_port, codec):
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port, codec) as client:
+        assert client.analyze("kill and scam") == analyze_text("kill and scam")
+        assert client.analyze("") == analyze_text("")
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_batch_matches_engine(tcp_port, codec):
+    texts = ["kill and scam", "hello", "scam scam"]
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port, codec) as client:
+        assert client.analyze_batch(texts) == analyze_batch(texts)
+        assert list(client.stream_batch(texts)) == analyze_batch(texts)
+
+
+def test_pipelined_requests_keep_order(tcp_port):
+    texts = [f"message {i} scam" if i % 2 else f"message {i}" for i in range(200)]
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port) as client:
+        results = list(client.analyze_many(texts, window=16))
+    assert results == [analyze_text(text) for text in texts]
+
+
+def test_unknown_op_returns_structured_error(tcp_port):
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port) as client:
+        client._send({"op": "bogus"})
+        response = client._recv()
+    assert response["result"]["errors"]["error_code"] == "UNKNOWN_OP"
+
+
+def test_oversized_frame_closes_connection(tcp_port):
+    with socket.create_connection(("127.0.0.1", tcp_port)) as sock:
+        sock.sendall(FRAME_HEADER.pack(1 << 30, CODEC_JSON))
+        with TransportClient(sock) as client:
+            response = client._recv()
+            assert response["result"]["errors"]["error_code"] == "FRAME_TOO_LARGE"
+            assert sock.recv(1) == b""
+
+
+def test_oversized_batch_gets_error_and_connection_survives(tcp_port):
+    texts = ["a short message about nothing in particular"] * 30000
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port) as client:
+        with pytest.raises(TransportError, match="FRAME_TOO_LARGE"):
+            client.analyze_batch(texts)
+        assert client.analyze("scam") == analyze_text("scam")
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_processing_error_returns_internal_error(tcp_port, monkeypatch, codec):
+    def explode(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(transport, "analyze_batch", explode)
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port, codec) as client:
+        request_id = client._send({"op": "batch", "texts": ["scam"]})
+        length, response_codec = FRAME_HEADER.unpack(client._rfile.read(FRAME_HEADER.size))
+        response = transport.decode_payload(client._rfile.read(length), response_codec)
+        assert response_codec == codec
+        assert response == {"id": request_id, "done": True, "result": transport.error_response(
+            "INTERNAL_ERROR", "Unexpected processing error"
+        )}
+        assert client.analyze("scam") == analyze_text("scam")
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_stream_failing_partway_raises(tcp_port, monkeypatch, codec):
+    calls = []
+
+    def fail_second_chunk(texts, *args):
+        calls.append(texts)
+        if len(calls) == 2:
+            raise RuntimeError("boom")
+        return analyze_batch(texts, *args)
+
+    monkeypatch.setattr(transport, "analyze_batch", fail_second_chunk)
+    texts = ["scam"] * (transport.STREAM_CHUNK_SIZE * 3)
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port, codec) as client:
+        results = []
+        with pytest.raises(TransportError, match="INTERNAL_ERROR"):
+            for result in client.stream_batch(texts):
+                results.append(result)
+        assert len(results) == transport.STREAM_CHUNK_SIZE
+        # the stream ended cleanly, so the connection is still usable
+        assert client.analyze("scam") == analyze_text("scam")
+
+
+def test_non_string_profile_is_rejected(tcp_port):
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port) as client:
+        result = client.analyze("scam", ["x"])
+        assert result["errors"]["error_code"] == "INVALID_TYPE"
+        with pytest.raises(TransportError, match="INVALID_TYPE"):
+            list(client.stream_batch(["scam"], ["x"]))
+
+
+def test_slow_request_does_not_block_other_connections(tcp_port):
+    texts = ["kill and scam " * 350] * 150
+    with TransportClient.connect_tcp("127.0.0.1", tcp_port) as slow, \
+            TransportClient.connect_tcp("127.0.0.1", tcp_port) as fast:
+        slow._send({"id": 1, "op": "batch", "texts": texts})
+        time.sleep(0.01)
+        started = time.perf_counter()
+        assert fast.analyze("scam") == analyze_text("scam")
+        fast_elapsed = time.perf_counter() - started
+        assert len(slow._recv()["results"]) == len(texts)
+        slow_elapsed = time.perf_counter() - started
+    assert fast_elapsed < slow_elapsed / 2
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets unavailable")
+def test_unix_socket_transport(loop, tmp_path):
+    path = str(tmp_path / "risk.sock")
+    server = asyncio.run_coroutine_threadsafe(start_unix_server(path), loop).result()
+    try:
+        with TransportClient.connect_unix(path) as client:
+            assert client.analyze("scam") == analyze_text("scam")
+    finally:
+        asyncio.run_coroutine_threadsafe(close_server(server), loop).result()